@@ -33,6 +33,17 @@ STRATEGY = {
     "macd_slow": 26,
     "macd_signal": 9,
     "min_candles_required": 50,
+    "min_atr_pct": 0.02,                 # lowered from 0.03 — below this it's too quiet to trade
+    # RSI bounds for the individual BUY rules
+    "rsi_trend_cross_buy_max": 60,       # uptrend + MACD cross up
+    "rsi_oversold_cross_max": 45,        # oversold bounce on MACD cross up
+    "rsi_trend_buy_max": 55,             # uptrend + MACD bullish (was 50)
+    "rsi_deep_oversold": 35,             # deep oversold + MACD bullish
+    # RSI bounds for the individual SELL rules
+    "rsi_trend_cross_sell_min": 40,      # downtrend + MACD cross down
+    "rsi_overbought_cross_min": 55,      # overbought drop on MACD cross down
+    "rsi_trend_sell_min": 45,            # downtrend + MACD bearish (was 50)
+    "rsi_overbought_exit": 65,           # overbought exit + MACD bearish
 }
 
 BACKTEST = {
@@ -10,19 +10,27 @@ Usage:
   python run.py --live --i-understand-risks   # Live trading (real money)
 """
 import argparse
+import functools
 import sys
 import os
-from dotenv import load_dotenv
+import signal
+import threading
 
-load_dotenv()
+@functools.lru_cache(maxsize=1)
+def _load_env() -> bool:
+    """Parse .env once per process; deferred so --help never pays for it"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return True
 
-# Print Railway server IP on startup (for Binance IP whitelist)
-try:
-    import requests as _r
-    _ip = _r.get("https://api.ipify.org", timeout=5).text
-    print(f"SERVER_IP: {_ip}")
-except Exception:
-    print("SERVER_IP: Could not detect")
+def _print_server_ip():
+    """Print Railway server IP on startup (for Binance IP whitelist)"""
+    try:
+        import requests as _r
+        _ip = _r.get("https://api.ipify.org", timeout=2).text
+        print(f"SERVER_IP: {_ip}")
+    except Exception:
+        print("SERVER_IP: Could not detect")
 
 def main():
     parser = argparse.ArgumentParser(description="Binance Trading Bot - Safety First")
@@ -31,10 +39,16 @@ def main():
     parser.add_argument("--live", action="store_true", help="Run live trading (real money)")
     parser.add_argument("--i-understand-risks", action="store_true", help="Required confirmation for live mode")
     args = parser.parse_args()
+    _load_env()
 
     if not args.backtest and not args.paper and not args.live:
         args.paper = True
 
+    if not args.backtest:
+        threading.Thread(target=_print_server_ip, daemon=True).start()
+        # Container stops send SIGTERM; exit normally so atexit hooks persist state
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     if args.backtest:
         print("\n" + "="*55)
         print("  BACKTEST MODE")
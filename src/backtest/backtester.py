@@ -1,10 +1,124 @@
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
 from config import RISK, TRADING, BACKTEST, STRATEGY
 from src.exchange.binance_client import BinanceClient
-from src.strategy.ema_rsi_macd import analyze
+from src.strategy.ema_rsi_macd import compute_indicators, signal_at
 from src.monitoring.logger import get_logger
 
+try:
+    from numba import njit
+except ImportError:  # optional: without numba the trade loop runs as plain NumPy
+    njit = None
+
 logger = get_logger("Backtester")
 
+KLINES_CACHE_DIR = Path(".cache") / "klines"
+
+_SIGNAL_CODES = {"HOLD": 0, "BUY": 1, "SELL": -1}
+_EXIT_REASONS = ("Stop Loss", "Take Profit", "Signal Exit", "Max Hold Time")
+
+
+def _simulate_kernel(close, high, low, signals, start, capital, fee_pct, slip_pct,
+                     sl_frac, tp_frac, risk_frac, min_order, max_hold):
+    """
+    _simulate's state machine, returning PnLs unrounded. Written to compile under
+    numba's nopython mode as well as run as plain NumPy.
+    """
+    # Every trade spans at least two bars, so this bounds the trade count
+    max_trades = len(close) // 2 + 1
+    pnls     = np.empty(max_trades, dtype=np.float64)
+    pnl_pcts = np.empty(max_trades, dtype=np.float64)
+    reasons  = np.empty(max_trades, dtype=np.uint8)
+    holds    = np.empty(max_trades, dtype=np.int32)
+    n_trades = 0
+    total_fees = 0.0
+
+    # Resolve trades event by event: jump to the next BUY bar, then find the first
+    # exit bar with vectorised comparisons. Max hold bounds the exit search window.
+    end = len(close) - 1
+    buy_bars = np.flatnonzero(signals[start:end] == 1) + start
+    hold_bars = max(math.ceil(max_hold), 1)
+    held = np.arange(1, hold_bars + 1)
+
+    k = 0
+    while k < len(buy_bars):
+        entry_i = int(buy_bars[k])
+        usdt = capital * risk_frac
+        if usdt < min_order:
+            break  # capital only changes when a trade closes, so no later BUY can fill
+        buy_price = close[entry_i] * (1 + slip_pct)
+        fee = usdt * fee_pct
+        total_fees += fee
+        qty = (usdt - fee) / buy_price
+        sl  = buy_price * (1 - sl_frac)
+        tp  = buy_price * (1 + tp_frac)
+
+        lo_i, hi_i = entry_i + 1, min(end, entry_i + hold_bars + 1)
+        hit_sl  = low[lo_i:hi_i] <= sl
+        hit_tp  = high[lo_i:hi_i] >= tp
+        hit_sig = signals[lo_i:hi_i] == -1
+        exits = hit_sl | hit_tp | hit_sig | (held[:hi_i - lo_i] >= max_hold)
+        if not exits.any():
+            break  # position still open when the data runs out
+        j = int(exits.argmax())
+        i = lo_i + j
+
+        if hit_sl[j]:
+            exit_price = sl * (1 - slip_pct)
+            reason = 0
+        elif hit_tp[j]:
+            exit_price = tp * (1 - slip_pct)
+            reason = 1
+        elif hit_sig[j]:
+            exit_price = close[i] * (1 - slip_pct)
+            reason = 2
+        else:
+            exit_price = close[i] * (1 - slip_pct)
+            reason = 3
+
+        fee = exit_price * qty * fee_pct
+        total_fees += fee
+        pnl = float((exit_price - buy_price) * qty - fee)
+        capital += pnl
+        pnls[n_trades]     = pnl
+        pnl_pcts[n_trades] = float((exit_price - buy_price) / buy_price) * 100
+        reasons[n_trades]  = reason
+        holds[n_trades]    = i - entry_i
+        n_trades += 1
+
+        k = int(np.searchsorted(buy_bars, i + 1))
+
+    return (pnls[:n_trades], pnl_pcts[:n_trades], reasons[:n_trades], holds[:n_trades],
+            total_fees, capital)
+
+_simulate_kernel_jit = njit(cache=True)(_simulate_kernel) if njit is not None else None
+
+
+def _simulate(close, high, low, signals, start, capital, fee_pct, slip_pct,
+              sl_frac, tp_frac, risk_frac, min_order, max_hold):
+    """
+    Trade state machine over plain float64/int8 arrays and scalars; all
+    parameters are passed in, so it reads no config.
+    Iterates over trades rather than bars, so cost scales with the trade count.
+    Trades are returned column-wise as parallel arrays:
+    (pnls, pnl_pcts, reason_codes, holds, total_fees, final_capital),
+    where reason_codes index into _EXIT_REASONS.
+    """
+    kernel = _simulate_kernel_jit if _simulate_kernel_jit is not None else _simulate_kernel
+    pnls, pnl_pcts, reasons, holds, total_fees, capital = kernel(
+        close, high, low, signals, start, capital, fee_pct, slip_pct,
+        sl_frac, tp_frac, risk_frac, min_order, max_hold)
+    # Rounded here rather than in the kernel: numba's round() differs from
+    # Python's correctly rounded one on halfway cases
+    pnls = np.array([round(p, 4) for p in pnls.tolist()], dtype=np.float64)
+    pnl_pcts = np.array([round(p, 2) for p in pnl_pcts.tolist()], dtype=np.float64)
+    return pnls, pnl_pcts, reasons, holds, float(total_fees), float(capital)
+
+
 class Backtester:
     def __init__(self, client: BinanceClient):
         self.client = client
@@ -15,7 +129,11 @@ class Backtester:
         limit = limit or BACKTEST["candle_limit"]
 
         logger.info(f"Starting backtest: {symbol} {interval} | {limit} candles")
-        df = self.client.get_klines(symbol, interval, limit)
+        df = self._cached_klines(symbol, interval, limit)
+
+        # Indicators are causal, so one pass over the full history serves both
+        # segments; the out-of-sample bars get fully warmed-up EMAs as a bonus
+        signals = self._precompute_signals(df)
 
         split = int(len(df) * 0.7)
         in_sample  = df.iloc[:split].reset_index(drop=True)
@@ -23,8 +141,8 @@ class Backtester:
 
         logger.info(f"In-sample: {len(in_sample)} candles | Out-of-sample: {len(out_sample)} candles")
 
-        in_results  = self._run_segment(in_sample,  "IN-SAMPLE")
-        out_results = self._run_segment(out_sample, "OUT-OF-SAMPLE")
+        in_results  = self._run_segment(in_sample,  signals[:split], "IN-SAMPLE")
+        out_results = self._run_segment(out_sample, signals[split:], "OUT-OF-SAMPLE")
 
         logger.info("Walk-forward validation complete")
         if out_results.get("win_rate", 0) < 40 or out_results.get("profit_factor", 0) < 1.0:
@@ -34,101 +152,86 @@ class Backtester:
 
         return {"in_sample": in_results, "out_sample": out_results}
 
-    def _run_segment(self, df, label: str) -> dict:
-        capital   = TRADING["capital_limit_usdt"]
-        initial   = capital
-        position  = None
-        trades    = []
+    def _cached_klines(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+        """
+        Historical klines, cached on disk per (symbol, interval, limit, UTC hour)
+        so repeated backtests skip the REST fetch. Set BACKTEST_NO_CACHE=1 to bypass.
+        """
+        if os.getenv("BACKTEST_NO_CACHE") == "1":
+            return self.client.get_klines(symbol, interval, limit)
+
+        stamp = datetime.utcnow().strftime("%Y%m%d%H")
+        # Plain column arrays loaded with allow_pickle=False, so a cache file can't run code
+        cache_path = KLINES_CACHE_DIR / f"{symbol}_{interval}_{limit}_{stamp}.npz"
+        if cache_path.exists():
+            try:
+                with np.load(cache_path, allow_pickle=False) as cached:
+                    df = pd.DataFrame({name: cached[name] for name in cached.files})
+                logger.info(f"Loaded {len(df)} cached candles from {cache_path}")
+                return df
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable klines cache {cache_path}: {e}")
+
+        df = self.client.get_klines(symbol, interval, limit)
+        if df.empty:
+            return df
+        try:
+            KLINES_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.savez(cache_path, **{name: df[name].to_numpy() for name in df.columns})
+        except Exception as e:
+            logger.warning(f"Could not write klines cache {cache_path}: {e}")
+        return df
+
+    def _precompute_signals(self, df) -> np.ndarray:
+        """Strategy signal per bar as int8 codes (1=BUY, -1=SELL, 0=HOLD)"""
+        indicators = compute_indicators(df)
+        signals = np.zeros(len(df), dtype=np.int8)
+        for i in range(STRATEGY["min_candles_required"], len(df)):
+            signals[i] = _SIGNAL_CODES[signal_at(indicators, i).signal]
+        return signals
+
+    def _run_segment(self, df, signals: np.ndarray, label: str) -> dict:
+        initial   = TRADING["capital_limit_usdt"]
         fee_pct   = RISK["fee_pct"] / 100 if BACKTEST["include_fees"] else 0
         slip_pct  = RISK["slippage_estimate_pct"] / 100 if BACKTEST["include_slippage"] else 0
-        total_fees = 0
         min_candles = STRATEGY["min_candles_required"]
 
-        for i in range(min_candles, len(df) - 1):
-            window = df.iloc[:i+1]
-            result = analyze(window)
-            price  = float(df.iloc[i]["close"])
-
-            if position is None and result.signal == "BUY":
-                usdt = capital * (RISK["risk_per_trade_pct"] / 100)
-                if usdt < TRADING["min_order_usdt"]:
-                    continue
-                buy_price = price * (1 + slip_pct)
-                fee = usdt * fee_pct
-                total_fees += fee
-                qty = (usdt - fee) / buy_price
-                sl  = buy_price * (1 - RISK["stop_loss_pct"] / 100)
-                tp  = buy_price * (1 + RISK["take_profit_pct"] / 100)
-                position = {"buy_price": buy_price, "qty": qty, "usdt": usdt,
-                            "sl": sl, "tp": tp, "entry_i": i}
-
-            elif position is not None:
-                exit_price = None
-                reason = ""
-                lo = float(df.iloc[i]["low"])
-                hi = float(df.iloc[i]["high"])
-
-                if lo <= position["sl"]:
-                    exit_price = position["sl"] * (1 - slip_pct)
-                    reason = "Stop Loss"
-                elif hi >= position["tp"]:
-                    exit_price = position["tp"] * (1 - slip_pct)
-                    reason = "Take Profit"
-                elif result.signal == "SELL":
-                    exit_price = price * (1 - slip_pct)
-                    reason = "Signal Exit"
-
-                holding = i - position["entry_i"]
-                if holding >= RISK["max_holding_hours"] and exit_price is None:
-                    exit_price = price * (1 - slip_pct)
-                    reason = "Max Hold Time"
-
-                if exit_price:
-                    fee = exit_price * position["qty"] * fee_pct
-                    total_fees += fee
-                    pnl = (exit_price - position["buy_price"]) * position["qty"] - fee
-                    capital += pnl
-                    trades.append({
-                        "pnl": round(pnl, 4),
-                        "pnl_pct": round(((exit_price - position["buy_price"]) / position["buy_price"]) * 100, 2),
-                        "reason": reason,
-                        "holding_candles": holding
-                    })
-                    position = None
-
-        total_trades = len(trades)
+        pnls, pnl_pcts, reasons, holds, total_fees, capital = _simulate(
+            df["close"].to_numpy(dtype=np.float64),
+            df["high"].to_numpy(dtype=np.float64),
+            df["low"].to_numpy(dtype=np.float64),
+            signals, min_candles, initial, fee_pct, slip_pct,
+            RISK["stop_loss_pct"] / 100, RISK["take_profit_pct"] / 100,
+            RISK["risk_per_trade_pct"] / 100, TRADING["min_order_usdt"], RISK["max_holding_hours"],
+        )
+
+        total_trades = len(pnls)
         if total_trades == 0:
             logger.warning(f"[{label}] No trades generated")
             return {"total_trades": 0, "label": label, "win_rate": 0, "profit_factor": 0}
 
-        wins = [t for t in trades if t["pnl"] > 0]
-        losses = [t for t in trades if t["pnl"] <= 0]
-        win_rate = len(wins) / total_trades * 100
-        gross_profit = sum(t["pnl"] for t in wins) if wins else 0
-        gross_loss = abs(sum(t["pnl"] for t in losses)) if losses else 1e-10
+        win_mask = pnls > 0
+        wins_n = int(win_mask.sum())
+        losses_n = total_trades - wins_n
+        win_rate = 100.0 * wins_n / total_trades
+        gross_profit = float(pnls[win_mask].sum())
+        gross_loss = float(-pnls[~win_mask].sum()) or 1e-10
         profit_factor = gross_profit / gross_loss
         total_return = ((capital - initial) / initial) * 100
         expectancy = (capital - initial) / total_trades
-        avg_hold = sum(t["holding_candles"] for t in trades) / total_trades
-
-        equity_curve = [initial]
-        running = initial
-        for t in trades:
-            running += t["pnl"]
-            equity_curve.append(running)
-        peak = equity_curve[0]
-        max_dd = 0
-        for e in equity_curve:
-            if e > peak:
-                peak = e
-            dd = (peak - e) / peak * 100
-            max_dd = max(max_dd, dd)
+        avg_hold = float(holds.mean())
+
+        equity_curve = initial + np.concatenate(([0.0], np.cumsum(pnls)))
+        peak = np.maximum.accumulate(equity_curve)
+        max_dd = float(((peak - equity_curve) / peak * 100).max())
+        reason_names = [_EXIT_REASONS[code] for code in reasons.tolist()]
+        reason_counts = np.bincount(reasons, minlength=len(_EXIT_REASONS)).tolist()
 
         results = {
             "label": label,
             "total_trades": total_trades,
-            "wins": len(wins),
-            "losses": len(losses),
+            "wins": wins_n,
+            "losses": losses_n,
             "win_rate": round(win_rate, 1),
             "profit_factor": round(profit_factor, 2),
             "total_return_pct": round(total_return, 2),
@@ -137,7 +240,15 @@ class Backtester:
             "total_fees_usdt": round(total_fees, 2),
             "avg_holding_candles": round(avg_hold, 1),
             "initial_capital": initial,
-            "final_capital": round(capital, 2)
+            "final_capital": round(capital, 2),
+            "exit_reasons": dict(zip(_EXIT_REASONS, reason_counts)),
+            # Per-trade breakdown, column-wise like the arrays it comes from
+            "trades": {
+                "pnl": pnls.tolist(),
+                "pnl_pct": pnl_pcts.tolist(),
+                "reason": reason_names,
+                "holding_candles": holds.tolist(),
+            },
         }
         self._print_results(results)
         return results
@@ -145,19 +256,25 @@ class Backtester:
     def _print_results(self, r: dict):
         passed = (r["win_rate"] >= 45 and r["profit_factor"] >= 1.2 and r["max_drawdown_pct"] <= 15)
         status = "PASS" if passed else "FAIL - Do NOT trade live yet"
-        logger.info(f"\n{'='*55}")
-        logger.info(f"  {r['label']} | {'PASS' if passed else 'FAIL'}: {status}")
-        logger.info(f"{'='*55}")
-        logger.info(f"  Total Trades:       {r['total_trades']}")
-        logger.info(f"  Wins / Losses:      {r['wins']} / {r['losses']}")
-        logger.info(f"  Win Rate:           {r['win_rate']}%")
-        logger.info(f"  Profit Factor:      {r['profit_factor']}")
-        logger.info(f"  Total Return:       {r['total_return_pct']:+.2f}%")
-        logger.info(f"  Max Drawdown:       {r['max_drawdown_pct']:.2f}%")
-        logger.info(f"  Expectancy/trade:   ${r['expectancy_usdt']:+.2f}")
-        logger.info(f"  Fees Paid:          ${r['total_fees_usdt']:.2f}")
-        logger.info(f"  Avg Hold (candles): {r['avg_holding_candles']}")
-        logger.info(f"  Final Capital:      ${r['final_capital']:.2f}")
-        logger.info(f"{'='*55}")
+        lines = [
+            "",
+            "=" * 55,
+            f"  {r['label']} | {'PASS' if passed else 'FAIL'}: {status}",
+            "=" * 55,
+            f"  Total Trades:       {r['total_trades']}",
+            f"  Wins / Losses:      {r['wins']} / {r['losses']}",
+            f"  Win Rate:           {r['win_rate']}%",
+            f"  Profit Factor:      {r['profit_factor']}",
+            f"  Total Return:       {r['total_return_pct']:+.2f}%",
+            f"  Max Drawdown:       {r['max_drawdown_pct']:.2f}%",
+            f"  Expectancy/trade:   ${r['expectancy_usdt']:+.2f}",
+            f"  Fees Paid:          ${r['total_fees_usdt']:.2f}",
+            f"  Avg Hold (candles): {r['avg_holding_candles']}",
+            "  Exits:              " + " | ".join(f"{k} {v}" for k, v in r["exit_reasons"].items()),
+            f"  Final Capital:      ${r['final_capital']:.2f}",
+            "=" * 55,
+        ]
+        # One record instead of fourteen: a single format + handler dispatch
+        logger.info("\n".join(lines))
         if not passed:
             logger.warning("Strategy did not meet minimum criteria. Review before proceeding.")
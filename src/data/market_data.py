@@ -1,4 +1,5 @@
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from config import TRADING
 from src.exchange.binance_client import BinanceClient
@@ -6,6 +7,8 @@ from src.exchange.binance_client import BinanceClient
 class MarketData:
     def __init__(self, client: BinanceClient):
         self.client = client
+        # Two workers: one per independent REST call in fetch_candles_and_price
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="market-data")
 
     def get_candles(self, symbol: str = None, interval: str = None, limit: int = 100) -> pd.DataFrame:
         symbol = symbol or TRADING["pair"]
@@ -36,6 +39,16 @@ class MarketData:
             raise ValueError(f"Price data is stale ({age:.1f}s old) — not trading")
         return price
 
+    def fetch_candles_and_price(self, limit: int = 100, max_age_seconds: int = 10) -> tuple[pd.DataFrame, float]:
+        """
+        Fetch candles and a fresh price concurrently, so a tick waits for the
+        slower of the two round-trips instead of their sum.
+        Errors (including a stale price) are re-raised in the caller.
+        """
+        candles = self._pool.submit(self.get_candles, limit=limit)
+        price = self._pool.submit(self.get_price_with_freshness, max_age_seconds=max_age_seconds)
+        return candles.result(), price.result()
+
     def is_liquid(self, symbol: str = None, min_spread_threshold: float = 0.1) -> bool:
         """Check if market is liquid enough to trade"""
         spread = self.get_spread_pct(symbol)
@@ -1,10 +1,13 @@
+import functools
 import os
 import time
 import hmac
 import hashlib
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from urllib.parse import urlencode
 
 # Try multiple endpoints in order until one works
 BASE_URLS = [
@@ -15,20 +18,46 @@ BASE_URLS = [
     "https://api4.binance.com",
 ]
 
+_KLINE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume", "close_time"]
+
+# exchangeInfo is ~1MB and lot-size/notional filters change rarely
+_EXCHANGE_INFO_TTL = 3600
+
+@functools.lru_cache(maxsize=1)
+def _credentials() -> tuple:
+    """API key pair, read from the environment once per process (after .env is loaded)"""
+    return os.getenv("BINANCE_API_KEY", ""), os.getenv("BINANCE_SECRET_KEY", "")
+
 class BinanceClient:
-    def __init__(self):
-        self.api_key = os.getenv("BINANCE_API_KEY", "")
-        self.secret_key = os.getenv("BINANCE_SECRET_KEY", "")
+    def __init__(self, cache_ttl: float = 0.25):
+        self.api_key, self.secret_key = _credentials()
 
         if not self.api_key or not self.secret_key:
             raise EnvironmentError("BINANCE_API_KEY and BINANCE_SECRET_KEY must be set in .env")
 
+        # Keyed HMAC state is built once; each signature works on a copy of it
+        self._signer = hmac.new(self.secret_key.encode(), digestmod=hashlib.sha256)
+
+        # One pooled keep-alive session so TLS handshakes are amortized across calls
+        self._session = requests.Session()
+        self._session.headers.update({"X-MBX-APIKEY": self.api_key})
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        self._session.mount("https://", adapter)
+
+        # Coalesce back-to-back price/orderbook polls; set cache_ttl=0 to disable
+        self.cache_ttl = cache_ttl
+        self._price_cache = {}
+        self._book_cache = {}
+        self._path_cache = {}
+
+        self._symbol_info_cache = {}
+        self._symbol_info_fetched_at = None
         self.base_url = self._find_working_endpoint()
 
     def _find_working_endpoint(self) -> str:
         for url in BASE_URLS:
             try:
-                r = requests.get(f"{url}/api/v3/ping", timeout=5)
+                r = self._session.get(f"{url}/api/v3/ping", timeout=5)
                 if r.status_code == 200:
                     print(f"Connected to Binance via: {url}")
                     return url
@@ -37,11 +66,22 @@ class BinanceClient:
         raise ConnectionError("All Binance endpoints are unreachable from this server. Check your network/region.")
 
     def _sign(self, params: dict) -> str:
-        query = "&".join([f"{k}={v}" for k, v in params.items()])
-        return hmac.new(self.secret_key.encode(), query.encode(), hashlib.sha256).hexdigest()
-
-    def _headers(self):
-        return {"X-MBX-APIKEY": self.api_key}
+        # Same encoding requests applies to params, so the signed string matches the wire query
+        query = urlencode(params)
+        mac = self._signer.copy()
+        mac.update(query.encode())
+        return mac.hexdigest()
+
+    def _symbol_path(self, endpoint: str, symbol: str, **params) -> str:
+        """
+        Pre-encoded endpoint+query for hot unsigned GETs, cached per (endpoint, symbol).
+        Extra params must be constant for a given endpoint.
+        """
+        key = (endpoint, symbol)
+        path = self._path_cache.get(key)
+        if path is None:
+            path = self._path_cache[key] = f"{endpoint}?{urlencode({'symbol': symbol, **params})}"
+        return path
 
     def _get(self, endpoint, params=None, signed=False, timeout=10):
         if params is None:
@@ -50,7 +90,7 @@ class BinanceClient:
             params["timestamp"] = int(time.time() * 1000)
             params["signature"] = self._sign(params)
         try:
-            r = requests.get(f"{self.base_url}{endpoint}", headers=self._headers(), params=params, timeout=timeout)
+            r = self._session.get(f"{self.base_url}{endpoint}", params=params, timeout=timeout)
             r.raise_for_status()
             return r.json()
         except requests.exceptions.Timeout:
@@ -62,7 +102,7 @@ class BinanceClient:
         params["timestamp"] = int(time.time() * 1000)
         params["signature"] = self._sign(params)
         try:
-            r = requests.post(f"{self.base_url}{endpoint}", headers=self._headers(), params=params, timeout=timeout)
+            r = self._session.post(f"{self.base_url}{endpoint}", params=params, timeout=timeout)
             r.raise_for_status()
             return r.json()
         except requests.exceptions.Timeout:
@@ -70,22 +110,38 @@ class BinanceClient:
 
     def get_klines(self, symbol: str, interval: str, limit: int = 100) -> pd.DataFrame:
         data = self._get("/api/v3/klines", {"symbol": symbol, "interval": interval, "limit": limit})
-        df = pd.DataFrame(data, columns=[
-            "timestamp", "open", "high", "low", "close", "volume",
-            "close_time", "quote_volume", "trades",
-            "taker_buy_base", "taker_buy_quote", "ignore"
-        ])
-        for col in ["open", "high", "low", "close", "volume"]:
-            df[col] = df[col].astype(float)
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        return df
+        if not data:
+            return pd.DataFrame(columns=_KLINE_COLUMNS)
+        # Convert OHLCV in one numpy pass; only the columns the bot reads are kept
+        arr = np.asarray(data, dtype=object)
+        ohlcv = arr[:, 1:6].astype(np.float64)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms"),
+            "open": ohlcv[:, 0],
+            "high": ohlcv[:, 1],
+            "low": ohlcv[:, 2],
+            "close": ohlcv[:, 3],
+            "volume": ohlcv[:, 4],
+            "close_time": arr[:, 6].astype(np.int64),
+        })
 
     def get_price(self, symbol: str) -> tuple:
-        data = self._get("/api/v3/ticker/price", {"symbol": symbol})
-        return float(data["price"]), datetime.utcnow()
+        cached = self._price_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+        data = self._get(self._symbol_path("/api/v3/ticker/price", symbol))
+        # The original fetch time is returned on cache hits so freshness checks stay honest
+        result = (float(data["price"]), datetime.utcnow())
+        self._price_cache[symbol] = (time.monotonic(), result)
+        return result
 
     def get_orderbook(self, symbol: str) -> dict:
-        return self._get("/api/v3/depth", {"symbol": symbol, "limit": 5})
+        cached = self._book_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+        book = self._get(self._symbol_path("/api/v3/depth", symbol, limit=5))
+        self._book_cache[symbol] = (time.monotonic(), book)
+        return book
 
     def get_balance(self, asset: str = "USDT") -> float:
         data = self._get("/api/v3/account", signed=True)
@@ -95,10 +151,15 @@ class BinanceClient:
         return 0.0
 
     def get_symbol_info(self, symbol: str) -> dict:
-        data = self._get("/api/v3/exchangeInfo")
-        for s in data["symbols"]:
-            if s["symbol"] == symbol:
-                return s
+        """Symbol filters from exchangeInfo, cached for all symbols for _EXCHANGE_INFO_TTL seconds"""
+        fetched_at = self._symbol_info_fetched_at
+        if fetched_at is None or time.monotonic() - fetched_at > _EXCHANGE_INFO_TTL:
+            data = self._get("/api/v3/exchangeInfo")
+            self._symbol_info_cache = {s["symbol"]: s for s in data["symbols"]}
+            self._symbol_info_fetched_at = time.monotonic()
+        info = self._symbol_info_cache.get(symbol)
+        if info is not None:
+            return info
         raise ValueError(f"Symbol {symbol} not found on Binance")
 
     def get_step_size(self, symbol: str) -> float:
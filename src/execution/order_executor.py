@@ -1,6 +1,6 @@
-import math
 import uuid
 from datetime import datetime
+from decimal import Decimal
 from config import RISK, TRADING
 from src.exchange.binance_client import BinanceClient
 from src.monitoring.logger import get_logger
@@ -10,9 +10,17 @@ logger = get_logger("OrderExecutor")
 class OrderExecutor:
     def __init__(self, client: BinanceClient):
         self.client = client
+        self._precision_cache = {}
 
-    def _round_qty(self, qty: float, step_size: float) -> float:
-        precision = int(round(-math.log(step_size, 10), 0))
+    def _compute_precision(self, symbol: str) -> int:
+        """Decimal places of the symbol's LOT_SIZE step, e.g. 0.0001 -> 4"""
+        step_size = self.client.get_step_size(symbol)
+        return -Decimal(str(step_size)).normalize().as_tuple().exponent
+
+    def _round_qty(self, qty: float, symbol: str) -> float:
+        precision = self._precision_cache.get(symbol)
+        if precision is None:
+            precision = self._precision_cache[symbol] = self._compute_precision(symbol)
         return round(qty, precision)
 
     def _estimate_cost(self, usdt_amount: float) -> float:
@@ -49,13 +57,13 @@ class OrderExecutor:
 
         # Get price
         price, ts = self.client.get_price(symbol)
-        age = (datetime.utcnow() - ts).total_seconds()
+        now = datetime.utcnow()
+        age = (now - ts).total_seconds()
         if age > RISK["stale_price_seconds"]:
             raise ValueError(f"Stale price ({age:.1f}s) — order blocked")
 
-        step_size = self.client.get_step_size(symbol)
         raw_qty = usdt_amount / price
-        quantity = self._round_qty(raw_qty, step_size)
+        quantity = self._round_qty(raw_qty, symbol)
         fees_estimated = self._estimate_cost(usdt_amount)
 
         if paper_mode:
@@ -68,18 +76,13 @@ class OrderExecutor:
                 "filled_price": price,
                 "usdt_used": usdt_amount,
                 "fees_estimated": fees_estimated,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": now.isoformat()
             }
 
-        # LIVE: use client order ID for idempotency (no duplicate orders)
+        # LIVE: use client order ID for idempotency — Binance rejects a duplicate
+        # newClientOrderId, so no pre-flight lookup is needed for a fresh ID
         client_order_id = f"bot_buy_{uuid.uuid4().hex[:16]}"
 
-        # Check if order already exists before placing
-        existing = self.client.get_order(symbol, client_order_id)
-        if existing:
-            logger.warning(f"Order {client_order_id} already exists — skipping to avoid duplicate")
-            return existing
-
         order = self.client.place_market_buy(symbol, quantity, client_order_id)
         filled_price = float(order.get("fills", [{}])[0].get("price", price))
         filled_qty = float(order.get("executedQty", quantity))
@@ -101,12 +104,12 @@ class OrderExecutor:
     def execute_sell(self, symbol: str, quantity: float, buy_price: float, paper_mode: bool = True) -> dict:
         """Execute a sell order safely"""
         price, ts = self.client.get_price(symbol)
-        age = (datetime.utcnow() - ts).total_seconds()
+        now = datetime.utcnow()
+        age = (now - ts).total_seconds()
         if age > RISK["stale_price_seconds"]:
             raise ValueError(f"Stale price ({age:.1f}s) — sell blocked")
 
-        step_size = self.client.get_step_size(symbol)
-        quantity = self._round_qty(quantity, step_size)
+        quantity = self._round_qty(quantity, symbol)
         usdt_received = quantity * price
         fees_estimated = self._estimate_cost(usdt_received)
         pnl = (price - buy_price) * quantity - fees_estimated
@@ -122,14 +125,10 @@ class OrderExecutor:
                 "usdt_received": usdt_received,
                 "fees_estimated": fees_estimated,
                 "pnl": round(pnl, 4),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": now.isoformat()
             }
 
         client_order_id = f"bot_sell_{uuid.uuid4().hex[:16]}"
-        existing = self.client.get_order(symbol, client_order_id)
-        if existing:
-            logger.warning(f"Sell order {client_order_id} already exists — skipping duplicate")
-            return existing
 
         order = self.client.place_market_sell(symbol, quantity, client_order_id)
         filled_price = float(order.get("fills", [{}])[0].get("price", price))
@@ -10,28 +10,40 @@ This mode requires:
 """
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from config import RISK, TRADING
 from src.exchange.binance_client import BinanceClient
 from src.data.market_data import MarketData
-from src.strategy.ema_rsi_macd import analyze
+from src.strategy.ema_rsi_macd import Strategy
 from src.risk.risk_manager import RiskManager
 from src.execution.order_executor import OrderExecutor
 from src.portfolio.portfolio_manager import PortfolioManager
 from src.monitoring.logger import get_logger
 from src.monitoring.alerts import alert_startup, alert_buy, alert_sell, alert_risk_block, alert_error, alert_daily_summary, alert_kill_switch
+from src.util.scheduling import timeframe_to_seconds, next_candle_close_utc
 
 logger = get_logger("LiveRunner")
 
+# Candles fetched to (re)build indicator state; later ticks fetch only what's new
+_HISTORY_CANDLES = 100
+
 class LiveRunner:
     def __init__(self):
+        # One RiskManager for the whole run: a second one on the same state files
+        # would hold its own stale copy of the state
+        self.risk = RiskManager()
         self._pre_flight_checks()
         self.client = BinanceClient()
         self.market = MarketData(self.client)
-        self.risk = RiskManager()
         self.executor = OrderExecutor(self.client)
         self.portfolio = PortfolioManager()
         self.last_daily_summary = datetime.utcnow().date()
+        # Static config snapshotted once; _tick reads these instead of the config dicts
+        self._pair = TRADING["pair"]
+        self._stale_s = RISK["stale_price_seconds"]
+        self._max_hold_h = RISK["max_holding_hours"]
+        self._tf_seconds = timeframe_to_seconds(TRADING["timeframe"])
+        self.strategy = Strategy(self._tf_seconds, _HISTORY_CANDLES)
 
     def _pre_flight_checks(self):
         """All checks must pass or live mode will NOT start"""
@@ -50,10 +62,9 @@ class LiveRunner:
             errors.append("KILL_SWITCH not set in .env — required for live mode")
 
         # Must not be already disabled by drawdown
-        risk = RiskManager()
-        status = risk.get_status()
+        status = self.risk.get_status()
         if status["live_trading_disabled"]:
-            errors.append("Live trading is DISABLED due to max drawdown breach — manual reset required")
+            errors.append("Live trading is DISABLED due to max drawdown breach — manual reset required: stop the bot and set live_trading_disabled to false in risk_state.json")
 
         if errors:
             for e in errors:
@@ -82,7 +93,11 @@ class LiveRunner:
                     alert_kill_switch()
                     break
 
-                self._tick()
+                try:
+                    self._tick()
+                finally:
+                    # One durable write per tick, however many risk updates it made
+                    self.risk.flush()
 
             except KeyboardInterrupt:
                 logger.info("Live engine stopped by user.")
@@ -96,21 +111,31 @@ class LiveRunner:
                 alert_daily_summary(self.portfolio.get_summary())
                 self.last_daily_summary = today
 
-            time.sleep(self._interval_seconds())
+            # Wake just after the next candle close instead of drifting by tick duration
+            wake_at = next_candle_close_utc(self._tf_seconds)
+            time.sleep(max(0, (wake_at - datetime.now(timezone.utc)).total_seconds()))
 
     def _tick(self):
-        df = self.market.get_candles(limit=100)
-        price = self.market.get_price_with_freshness(max_age_seconds=RISK["stale_price_seconds"])
-        result = analyze(df)
-
-        logger.info(f"[LIVE] Price: ${price:,.2f} | Signal: {result.signal} | Confidence: {result.confidence:.2f}")
+        now_ms = datetime.now(timezone.utc).timestamp() * 1000
+        tf_ms = self._tf_seconds * 1000
+        latest_close_ms = int(now_ms // tf_ms) * tf_ms - 1
+        df, price = self.market.fetch_candles_and_price(
+            limit=self.strategy.candle_limit(latest_close_ms), max_age_seconds=self._stale_s
+        )
+        # Only closed candles feed the incremental strategy state
+        df = df[df["close_time"] < now_ms]
+        if df.empty:
+            logger.warning("No closed candles available — skipping tick")
+            return
+        result = self.strategy.analyze_window(df, self.market.get_candles)
+
+        logger.info("[LIVE] Price: $%s | Signal: %s | Confidence: %.2f", f"{price:,.2f}", result.signal, result.confidence)
 
         if self.portfolio.has_position():
             pos = self.portfolio.get_position()
             sl = self.risk.get_stop_loss(pos["buy_price"])
             tp = self.risk.get_take_profit(pos["buy_price"])
-            opened_at = datetime.fromisoformat(pos["opened_at"])
-            held_hours = (datetime.utcnow() - opened_at).total_seconds() / 3600
+            held_hours = (time.time() - pos["opened_at_ts"]) / 3600
 
             exit_reason = None
             if price <= sl:
@@ -119,14 +144,15 @@ class LiveRunner:
                 exit_reason = "Take Profit"
             elif result.signal == "SELL":
                 exit_reason = "Strategy Signal"
-            elif held_hours >= RISK["max_holding_hours"]:
+            elif held_hours >= self._max_hold_h:
                 exit_reason = "Max Hold Time"
 
             if exit_reason:
-                sell = self.executor.execute_sell(TRADING["pair"], pos["quantity"], pos["buy_price"], paper_mode=False)
-                self.risk.on_trade_close(sell["pnl"])
+                sell = self.executor.execute_sell(self._pair, pos["quantity"], pos["buy_price"], paper_mode=False)
                 self.portfolio.close_position(price, sell["pnl"], exit_reason)
-                alert_sell(TRADING["pair"], price, pos["buy_price"], sell["pnl"], exit_reason, "live")
+                alert_sell(self._pair, price, pos["buy_price"], sell["pnl"], exit_reason, "live")
+                # Last: it raises if a drawdown lockout can't be persisted, and the sell is already done
+                self.risk.on_trade_close(sell["pnl"])
         else:
             if result.signal == "BUY":
                 balance = self.client.get_balance("USDT")
@@ -138,13 +164,9 @@ class LiveRunner:
                     alert_risk_block(reason)
                     return
 
-                buy = self.executor.execute_buy(TRADING["pair"], usdt_to_use, paper_mode=False)
+                buy = self.executor.execute_buy(self._pair, usdt_to_use, paper_mode=False)
                 self.risk.on_trade_open()
-                self.portfolio.open_position(TRADING["pair"], buy["filled_price"], buy["quantity"], usdt_to_use)
+                self.portfolio.open_position(self._pair, buy["filled_price"], buy["quantity"], usdt_to_use)
                 sl = self.risk.get_stop_loss(buy["filled_price"])
                 tp = self.risk.get_take_profit(buy["filled_price"])
-                alert_buy(TRADING["pair"], buy["filled_price"], buy["quantity"], usdt_to_use, sl, tp, result.confidence, "live")
-
-    def _interval_seconds(self):
-        mapping = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
-        return mapping.get(TRADING["timeframe"], 3600)
+                alert_buy(self._pair, buy["filled_price"], buy["quantity"], usdt_to_use, sl, tp, result.confidence, "live")
@@ -1,19 +1,92 @@
+import atexit
+import functools
+import html
 import os
+import queue
+import threading
 import requests
 from datetime import datetime
 from src.monitoring.logger import get_logger
 
 logger = get_logger("Alerts")
 
-def _send(message: str):
+# Reused across alerts so each message rides an existing keep-alive TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+_SHORT_TIME_FMT = "%H:%M UTC"
+
+@functools.lru_cache(maxsize=1)
+def _telegram_config() -> tuple:
+    """(sendMessage URL, chat_id) read from the environment once; URL is None if unconfigured"""
     token = os.getenv("TELEGRAM_TOKEN", "")
     chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
     if not token or not chat_id:
+        return None, None
+    return f"https://api.telegram.org/bot{token}/sendMessage", chat_id
+
+def _now_short() -> str:
+    return datetime.utcnow().strftime(_SHORT_TIME_FMT)
+
+# Alerts are delivered by one background worker so trading ticks never wait on Telegram
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+# Alerts arriving within this window of each other go out as one sendMessage
+_COALESCE_SECONDS = 0.5
+_COALESCE_SEPARATOR = "\n\n――――\n"
+_MAX_MESSAGE_CHARS = 4096  # Telegram's sendMessage text limit
+
+def _worker_loop():
+    pending = None
+    while True:
+        batch = [pending if pending is not None else _queue.get()]
+        pending = None
+        size = len(batch[0])
+        try:
+            while True:
+                try:
+                    message = _queue.get(timeout=_COALESCE_SECONDS)
+                except queue.Empty:
+                    break
+                if size + len(_COALESCE_SEPARATOR) + len(message) > _MAX_MESSAGE_CHARS:
+                    pending = message  # starts the next batch; order is preserved
+                    break
+                batch.append(message)
+                size += len(_COALESCE_SEPARATOR) + len(message)
+            status = _do_send(_COALESCE_SEPARATOR.join(batch))
+            if status is not None and status != 200 and len(batch) > 1:
+                # Telegram rejected the combined text; resend one by one so a single
+                # bad message doesn't take the others down with it
+                for message in batch:
+                    _do_send(message)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+def _send(message: str):
+    """Queue an alert and return immediately; delivery happens on the worker thread"""
+    global _worker
+    if _telegram_config()[0] is None:
         logger.warning("Telegram not configured — TELEGRAM_TOKEN or TELEGRAM_CHAT_ID missing")
         return
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_worker_loop, name="telegram-alerts", daemon=True)
+                _worker.start()
+    _queue.put(message)
+
+# Flush pending alerts (e.g. kill switch, fatal error) before the process exits
+atexit.register(_queue.join)
+
+def _do_send(message: str):
+    """POST one sendMessage; returns the HTTP status, or None if the request itself failed"""
+    url, chat_id = _telegram_config()
     try:
-        r = requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
+        r = _SESSION.post(
+            url,
             json={"chat_id": chat_id, "text": message, "parse_mode": "HTML"},
             timeout=10
         )
@@ -21,26 +94,29 @@ def _send(message: str):
             logger.info("Telegram alert sent OK")
         else:
             logger.error(f"Telegram alert FAILED: {r.status_code} - {r.text}")
+        return r.status_code
     except Exception as e:
         logger.error(f"Telegram alert exception: {e}")
+        return None
 
 def alert_startup(mode: str, pair: str, capital: float):
     _send(f"🤖 <b>Bot Started</b>\nMode: <b>{mode.upper()}</b>\nPair: {pair}\nCapital: ${capital}\nTime: {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC")
 
 def alert_buy(symbol, price, qty, usdt, sl, tp, confidence, mode):
     mode_tag = "📝 PAPER" if mode == "paper" else "🔴 LIVE"
-    _send(f"🟢 <b>BUY | {mode_tag}</b>\n{symbol} @ ${price:,.2f}\nQty: {qty} | Used: ${usdt:.2f}\nSL: ${sl:,.2f} | TP: ${tp:,.2f}\nConfidence: {confidence:.0%}\n{datetime.utcnow().strftime('%H:%M UTC')}")
+    _send(f"🟢 <b>BUY | {mode_tag}</b>\n{symbol} @ ${price:,.2f}\nQty: {qty} | Used: ${usdt:.2f}\nSL: ${sl:,.2f} | TP: ${tp:,.2f}\nConfidence: {confidence:.0%}\n{_now_short()}")
 
 def alert_sell(symbol, price, buy_price, pnl, reason, mode):
     mode_tag = "📝 PAPER" if mode == "paper" else "🔴 LIVE"
     emoji = "💰" if pnl >= 0 else "🔴"
-    _send(f"{emoji} <b>SELL | {mode_tag}</b>\n{symbol} @ ${price:,.2f}\nBuy: ${buy_price:,.2f} | PnL: ${pnl:+.2f}\nReason: {reason}\n{datetime.utcnow().strftime('%H:%M UTC')}")
+    _send(f"{emoji} <b>SELL | {mode_tag}</b>\n{symbol} @ ${price:,.2f}\nBuy: ${buy_price:,.2f} | PnL: ${pnl:+.2f}\nReason: {html.escape(reason)}\n{_now_short()}")
 
 def alert_risk_block(reason: str):
-    _send(f"🚫 <b>Trade Blocked by Risk Manager</b>\n{reason}\n{datetime.utcnow().strftime('%H:%M UTC')}")
+    # Free text like "(0.50 < 0.55)" would otherwise be parsed as HTML and rejected
+    _send(f"🚫 <b>Trade Blocked by Risk Manager</b>\n{html.escape(reason)}\n{_now_short()}")
 
 def alert_error(error: str):
-    _send(f"⚠️ <b>Bot Error</b>\n{error}\n{datetime.utcnow().strftime('%H:%M UTC')}")
+    _send(f"⚠️ <b>Bot Error</b>\n{html.escape(error)}\n{_now_short()}")
 
 def alert_daily_summary(summary: dict):
     _send(
@@ -1,25 +1,38 @@
 import logging
 import os
 import sys
-from datetime import datetime
+from logging.handlers import TimedRotatingFileHandler
 
 LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
+_FORMATTER = logging.Formatter(
+    "[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+# One file handler shared by every logger: rotation renames bot.log, so separate
+# handlers on the same file would each rotate it (or keep writing to the old one)
+_file_handler = None
+
+def _get_file_handler() -> logging.Handler:
+    global _file_handler
+    if _file_handler is None:
+        _file_handler = TimedRotatingFileHandler(
+            os.path.join(LOG_DIR, "bot.log"),
+            when="midnight", utc=True, backupCount=30, encoding="utf-8"
+        )
+        _file_handler.setFormatter(_FORMATTER)
+    return _file_handler
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
     logger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-        "[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    logger.propagate = False
     ch = logging.StreamHandler(sys.stdout)
-    ch.setFormatter(formatter)
+    ch.setFormatter(_FORMATTER)
     logger.addHandler(ch)
-    log_file = os.path.join(LOG_DIR, datetime.now().strftime("%Y-%m-%d") + ".log")
-    fh = logging.FileHandler(log_file, encoding="utf-8")
-    fh.setFormatter(formatter)
-    logger.addHandler(fh)
+    logger.addHandler(_get_file_handler())
     return logger
@@ -1,38 +1,21 @@
+import logging
 import time
 from datetime import datetime, timezone
 from config import RISK, TRADING
 from src.exchange.binance_client import BinanceClient
 from src.data.market_data import MarketData
-from src.strategy.ema_rsi_macd import analyze
+from src.strategy.ema_rsi_macd import Strategy
 from src.risk.risk_manager import RiskManager
 from src.execution.order_executor import OrderExecutor
 from src.portfolio.portfolio_manager import PortfolioManager
 from src.monitoring.logger import get_logger
 from src.monitoring.alerts import alert_startup, alert_buy, alert_sell, alert_risk_block, alert_error, alert_daily_summary
+from src.util.scheduling import timeframe_to_seconds, next_candle_close_utc
 
 logger = get_logger("PaperEngine")
 
-# Canonical Binance-supported intervals only
-_TIMEFRAME_SECONDS = {
-    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
-    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600,
-    "8h": 28800, "12h": 43200, "1d": 86400, "3d": 259200,
-    "1w": 604800,
-}
-_CLOSE_BUFFER_SECONDS = 2
-
-
-def _timeframe_to_seconds(tf: str) -> int:
-    if tf not in _TIMEFRAME_SECONDS:
-        supported = ", ".join(_TIMEFRAME_SECONDS.keys())
-        raise ValueError(f"Unsupported timeframe '{tf}'. Supported: {supported}")
-    return _TIMEFRAME_SECONDS[tf]
-
-
-def _next_candle_close_utc(tf_seconds: int) -> datetime:
-    now_ts = datetime.now(timezone.utc).timestamp()
-    next_boundary = (int(now_ts / tf_seconds) + 1) * tf_seconds
-    return datetime.fromtimestamp(next_boundary + _CLOSE_BUFFER_SECONDS, tz=timezone.utc)
+# Candles fetched to (re)build indicator state; later ticks fetch only what's new
+_HISTORY_CANDLES = 101
 
 
 class PaperEngine:
@@ -44,7 +27,13 @@ class PaperEngine:
         self.portfolio = PortfolioManager()
         self.last_daily_summary = datetime.now(timezone.utc).date()
         self._last_processed_candle_close = None
-        self._tf_seconds = _timeframe_to_seconds(TRADING["timeframe"])
+        # Static config snapshotted once; _tick reads these instead of the config dicts
+        self._pair = TRADING["pair"]
+        self._capital = TRADING["capital_limit_usdt"]
+        self._stale_s = RISK["stale_price_seconds"]
+        self._max_hold_h = RISK["max_holding_hours"]
+        self._tf_seconds = timeframe_to_seconds(TRADING["timeframe"])
+        self.strategy = Strategy(self._tf_seconds, _HISTORY_CANDLES)
 
     def run(self):
         logger.info("=" * 55)
@@ -57,7 +46,7 @@ class PaperEngine:
 
         while True:
             try:
-                wake_at = _next_candle_close_utc(self._tf_seconds)
+                wake_at = next_candle_close_utc(self._tf_seconds)
                 now = datetime.now(timezone.utc)
                 sleep_secs = max(0, (wake_at - now).total_seconds())
                 logger.info(
@@ -66,7 +55,11 @@ class PaperEngine:
                     f"(in {int(sleep_secs)}s)"
                 )
                 time.sleep(sleep_secs)
-                self._tick()
+                try:
+                    self._tick()
+                finally:
+                    # One durable write per tick, however many risk updates it made
+                    self.risk.flush()
 
             except ValueError as e:
                 logger.error(f"Fatal config error: {e}")
@@ -91,9 +84,20 @@ class PaperEngine:
             logger.warning(msg)
             return
 
-        df = self.market.get_candles(limit=101)
         now_ms = datetime.now(timezone.utc).timestamp() * 1000
 
+        # Dedup before any network call: if the newest candle that can have closed
+        # by now (Binance close_time = next open - 1ms) was already processed, skip
+        tf_ms = self._tf_seconds * 1000
+        latest_close_ms = int(now_ms // tf_ms) * tf_ms - 1
+        if self._last_processed_candle_close == latest_close_ms:
+            logger.debug("Latest candle already processed — skipping tick before fetch")
+            return
+
+        df, price = self.market.fetch_candles_and_price(
+            limit=self.strategy.candle_limit(latest_close_ms), max_age_seconds=self._stale_s
+        )
+
         # Exclude currently-open candle
         df = df[df["close_time"] < now_ms].copy()
 
@@ -101,7 +105,7 @@ class PaperEngine:
             logger.warning("No closed candles available — skipping tick")
             return
 
-        last_closed_ts_ms = int(df.iloc[-1]["close_time"])
+        last_closed_ts_ms = int(df["close_time"].iat[-1])
         last_closed_dt = datetime.fromtimestamp(last_closed_ts_ms / 1000, tz=timezone.utc)
 
         # Dedup: skip if already processed this candle
@@ -109,23 +113,23 @@ class PaperEngine:
             logger.info(f"Already processed candle close {last_closed_dt.strftime('%H:%M:%S')} UTC — skipping")
             return
 
-        result = analyze(df)
-        price = self.market.get_price_with_freshness(max_age_seconds=RISK["stale_price_seconds"])
-
-        pos_status = "OPEN" if self.portfolio.has_position() else "NONE"
-        equity_str = ""
-        if self.portfolio.has_position():
-            pos = self.portfolio.get_position()
-            unrealized = (price - pos["buy_price"]) * pos["quantity"]
-            equity_str = f" | unrealized: ${unrealized:+.2f}"
-
-        logger.info(
-            f"---- Heartbeat | Price: ${price:,.2f} | Signal: {result.signal} | "
-            f"Confidence: {result.confidence:.2f} | RSI: {result.indicators.get('rsi', 'N/A')} | "
-            f"last_closed_candle: {last_closed_dt.strftime('%H:%M:%S')} UTC | "
-            f"analyzed_candle: {last_closed_dt.strftime('%H:%M:%S')} UTC | "
-            f"position: {pos_status}{equity_str} ----"
-        )
+        result = self.strategy.analyze_window(df, self.market.get_candles)
+
+        # The heartbeat is the largest per-tick record; skip building it if INFO is filtered
+        if logger.isEnabledFor(logging.INFO):
+            pos_status = "OPEN" if self.portfolio.has_position() else "NONE"
+            equity_str = ""
+            if self.portfolio.has_position():
+                pos = self.portfolio.get_position()
+                unrealized = (price - pos["buy_price"]) * pos["quantity"]
+                equity_str = f" | unrealized: ${unrealized:+.2f}"
+            candle_str = last_closed_dt.strftime("%H:%M:%S")
+            logger.info(
+                "---- Heartbeat | Price: $%s | Signal: %s | Confidence: %.2f | RSI: %s | "
+                "last_closed_candle: %s UTC | analyzed_candle: %s UTC | position: %s%s ----",
+                f"{price:,.2f}", result.signal, result.confidence, result.indicators.get("rsi", "N/A"),
+                candle_str, candle_str, pos_status, equity_str,
+            )
 
         self._last_processed_candle_close = last_closed_ts_ms
 
@@ -133,12 +137,11 @@ class PaperEngine:
             pos = self.portfolio.get_position()
             sl = self.risk.get_stop_loss(pos["buy_price"])
             tp = self.risk.get_take_profit(pos["buy_price"])
-            opened_at = datetime.fromisoformat(pos["opened_at"])
-            held_hours = (datetime.utcnow() - opened_at).total_seconds() / 3600
+            held_hours = (time.time() - pos["opened_at_ts"]) / 3600
 
             exit_reason = None
-            lo = float(df.iloc[-1]["low"])
-            hi = float(df.iloc[-1]["high"])
+            lo = float(df["low"].iat[-1])
+            hi = float(df["high"].iat[-1])
 
             if lo <= sl:
                 exit_reason = "Stop Loss"
@@ -146,18 +149,19 @@ class PaperEngine:
                 exit_reason = "Take Profit"
             elif result.signal == "SELL":
                 exit_reason = "Strategy Signal"
-            elif held_hours >= RISK["max_holding_hours"]:
+            elif held_hours >= self._max_hold_h:
                 exit_reason = "Max Hold Time"
 
             if exit_reason:
-                sell = self.executor.execute_sell(TRADING["pair"], pos["quantity"], pos["buy_price"], paper_mode=True)
-                self.risk.on_trade_close(sell["pnl"])
+                sell = self.executor.execute_sell(self._pair, pos["quantity"], pos["buy_price"], paper_mode=True)
                 self.portfolio.close_position(price, sell["pnl"], exit_reason)
-                alert_sell(TRADING["pair"], price, pos["buy_price"], sell["pnl"], exit_reason, "paper")
+                alert_sell(self._pair, price, pos["buy_price"], sell["pnl"], exit_reason, "paper")
+                # Last: it raises if a drawdown lockout can't be persisted, and the sell is already done
+                self.risk.on_trade_close(sell["pnl"])
 
         else:
             if result.signal == "BUY":
-                balance = TRADING["capital_limit_usdt"]
+                balance = self._capital
                 usdt_to_use = self.risk.calculate_position_size(balance)
                 allowed, reason = self.risk.can_open_position(usdt_to_use, result.confidence)
 
@@ -166,9 +170,9 @@ class PaperEngine:
                     alert_risk_block(reason)
                     return
 
-                buy = self.executor.execute_buy(TRADING["pair"], usdt_to_use, paper_mode=True)
+                buy = self.executor.execute_buy(self._pair, usdt_to_use, paper_mode=True)
                 self.risk.on_trade_open()
-                self.portfolio.open_position(TRADING["pair"], buy["filled_price"], buy["quantity"], usdt_to_use)
+                self.portfolio.open_position(self._pair, buy["filled_price"], buy["quantity"], usdt_to_use)
                 sl = self.risk.get_stop_loss(buy["filled_price"])
                 tp = self.risk.get_take_profit(buy["filled_price"])
-                alert_buy(TRADING["pair"], buy["filled_price"], buy["quantity"], usdt_to_use, sl, tp, result.confidence, "paper")
+                alert_buy(self._pair, buy["filled_price"], buy["quantity"], usdt_to_use, sl, tp, result.confidence, "paper")
@@ -1,6 +1,7 @@
 import json
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from src.monitoring.logger import get_logger
 
 logger = get_logger("PortfolioManager")
@@ -8,29 +9,90 @@ logger = get_logger("PortfolioManager")
 # Use /data volume on Railway (persistent), fallback to local for dev
 _DATA_DIR = "/data" if os.path.exists("/data") else "."
 PORTFOLIO_FILE = os.path.join(_DATA_DIR, "portfolio_state.json")
+# Closed trades are appended here one JSON object per line, so saving never
+# rewrites the full history; PORTFOLIO_FILE only holds the open position
+TRADES_FILE = os.path.join(_DATA_DIR, "trades.jsonl")
 
 class PortfolioManager:
     def __init__(self):
         logger.info(f"Portfolio state file: {PORTFOLIO_FILE}")
         self.state = self._load()
+        self._dirty = False
+        # Running aggregates for get_summary, backfilled once from the journal
+        self._wins = self._losses = 0
+        self._total_pnl = self._gross_profit = self._gross_loss = 0.0
+        for trade in self.state["trade_history"]:
+            self._tally(trade["pnl"])
+
+    def _tally(self, pnl: float):
+        self._total_pnl += pnl
+        if pnl > 0:
+            self._wins += 1
+            self._gross_profit += pnl
+        else:
+            self._losses += 1
+            self._gross_loss -= pnl
 
     def _load(self) -> dict:
+        state = {"position": None, "trade_history": []}
         if os.path.exists(PORTFOLIO_FILE):
             try:
                 with open(PORTFOLIO_FILE) as f:
                     data = json.load(f)
-                    if data.get("position"):
-                        pos = data["position"]
-                        logger.info(f"Restored open position: {pos['quantity']} {pos['symbol']} @ ${pos['buy_price']:,.2f}")
-                    return data
+                if data.get("position"):
+                    pos = data["position"]
+                    logger.info(f"Restored open position: {pos['quantity']} {pos['symbol']} @ ${pos['buy_price']:,.2f}")
+                    if "opened_at_ts" not in pos:
+                        # Positions saved before opened_at_ts existed: derive it from the ISO stamp once
+                        opened = datetime.fromisoformat(pos["opened_at"]).replace(tzinfo=timezone.utc)
+                        pos["opened_at_ts"] = opened.timestamp()
+                state["position"] = data.get("position")
+                # Older state files embedded the whole history; move it into the journal once
+                if data.get("trade_history") and not os.path.exists(TRADES_FILE):
+                    for trade in data["trade_history"]:
+                        self._append_trade(trade)
+                    logger.info(f"Migrated {len(data['trade_history'])} trades to {TRADES_FILE}")
             except Exception as e:
                 logger.error(f"Failed to load portfolio state: {e} — starting fresh")
-        return {"position": None, "trade_history": []}
+        state["trade_history"] = self._load_trades()
+        return state
+
+    def _load_trades(self) -> list:
+        trades = []
+        if not os.path.exists(TRADES_FILE):
+            return trades
+        try:
+            with open(TRADES_FILE) as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        trades.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"Skipping unreadable trade record at {TRADES_FILE}:{line_no}")
+        except Exception as e:
+            logger.error(f"Failed to load trade history: {e}")
+        return trades
+
+    def _append_trade(self, trade: dict):
+        try:
+            with open(TRADES_FILE, "a") as f:
+                f.write(json.dumps(trade, default=str) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to append trade record: {e}")
 
     def _save(self):
+        """Write via a temp file + os.replace so a crash never leaves a torn state file"""
+        if not self._dirty:
+            return
+        tmp = PORTFOLIO_FILE + ".tmp"
         try:
-            with open(PORTFOLIO_FILE, "w") as f:
-                json.dump(self.state, f, indent=2, default=str)
+            with open(tmp, "w") as f:
+                json.dump({"position": self.state["position"]}, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, PORTFOLIO_FILE)
+            self._dirty = False
         except Exception as e:
             logger.error(f"Failed to save portfolio state: {e}")
 
@@ -43,8 +105,11 @@ class PortfolioManager:
             "buy_price": buy_price,
             "quantity": quantity,
             "usdt_used": usdt_used,
-            "opened_at": datetime.utcnow().isoformat()
+            "opened_at": datetime.utcnow().isoformat(),
+            # Epoch seconds for holding-time checks; opened_at stays for humans
+            "opened_at_ts": time.time()
         }
+        self._dirty = True
         self._save()
         logger.info(f"Position opened: {quantity} {symbol} @ ${buy_price:,.2f}")
 
@@ -54,8 +119,13 @@ class PortfolioManager:
         pos = self.state["position"]
         trade = {**pos, "sell_price": sell_price, "pnl": pnl,
                  "reason": reason, "closed_at": datetime.utcnow().isoformat()}
+        # Journal the trade before clearing the position: a crash in between leaves the
+        # position to re-close on restart instead of a closed trade missing from the journal
+        self._append_trade(trade)
         self.state["trade_history"].append(trade)
+        self._tally(pnl)
         self.state["position"] = None
+        self._dirty = True
         self._save()
         logger.info(f"Position closed | PnL: ${pnl:+.2f} | Reason: {reason}")
 
@@ -63,22 +133,17 @@ class PortfolioManager:
         return self.state["position"]
 
     def get_summary(self) -> dict:
-        history = self.state["trade_history"]
-        if not history:
+        total = self._wins + self._losses
+        if not total:
             return {"total_trades": 0}
-        wins = [t for t in history if t["pnl"] > 0]
-        losses = [t for t in history if t["pnl"] <= 0]
-        total_pnl = sum(t["pnl"] for t in history)
-        gross_profit = sum(t["pnl"] for t in wins) if wins else 0
-        gross_loss = abs(sum(t["pnl"] for t in losses)) if losses else 0
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else float("inf")
-        win_rate = len(wins) / len(history) * 100 if history else 0
+        gross_loss = self._gross_loss
+        profit_factor = self._gross_profit / gross_loss if gross_loss > 0 else float("inf")
         return {
-            "total_trades": len(history),
-            "wins": len(wins),
-            "losses": len(losses),
-            "win_rate_pct": round(win_rate, 1),
-            "total_pnl": round(total_pnl, 2),
+            "total_trades": total,
+            "wins": self._wins,
+            "losses": self._losses,
+            "win_rate_pct": round(self._wins / total * 100, 1),
+            "total_pnl": round(self._total_pnl, 2),
             "profit_factor": round(profit_factor, 2),
-            "avg_pnl_per_trade": round(total_pnl / len(history), 2)
+            "avg_pnl_per_trade": round(self._total_pnl / total, 2)
         }
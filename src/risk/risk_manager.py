@@ -1,13 +1,45 @@
 import os
+import atexit
 import json
-from datetime import datetime, date
+import mmap
+import queue
+import signal
+import threading
+import time
+from datetime import datetime, date, timedelta
 from config import RISK, TRADING
 from src.monitoring.logger import get_logger
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used when it isn't installed
+    orjson = None
+
 logger = get_logger("RiskManager")
 
 _DATA_DIR = "/data" if os.path.exists("/data") else "."
 STATE_FILE = os.path.join(_DATA_DIR, "risk_state.json")
+# Each flush appends the changed keys here as one JSON line; the snapshot in
+# STATE_FILE is only rewritten when the log is compacted, and on shutdown.
+# To reset the state by hand (e.g. clear live_trading_disabled), stop the bot
+# and edit STATE_FILE: a snapshot modified after the last WAL write wins over the log.
+WAL_FILE = os.path.join(_DATA_DIR, "risk_state.wal")
+_WAL_COMPACT_EVERY = 100  # appended records before compacting into STATE_FILE
+_WRITER_QUEUE_SIZE = 64  # pending writes before flush() stops enqueueing and retries next tick
+# The newest RiskManager per WAL path. Only it writes, so an older instance on the
+# same files can't overwrite newer state with its stale copy on flush or shutdown.
+_owners = {}
+
+def _dumps(obj, indent: bool = True) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+def _loads(data):
+    """Parse bytes or any buffer (e.g. a memoryview over an mmap)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
 
 class RiskManager:
     """
@@ -17,41 +49,234 @@ class RiskManager:
 
     def __init__(self):
         self.state = self._load_state()
+        self._wal_path = WAL_FILE
+        _owners[WAL_FILE] = self
         self.equity = TRADING["capital_limit_usdt"]
+        # Mutations only mark the state dirty; flush() persists them in one write
+        self._dirty = False
+        self._persisted = dict(self.state)
+        self._wal = open(WAL_FILE, "ab")
+        self._wal_records = 0
+        # All disk I/O runs on one writer thread; the trading thread only serializes and enqueues
+        self._writer_q = queue.Queue(maxsize=_WRITER_QUEUE_SIZE)
+        # Batches that failed to reach disk: bumped only by the writer thread and compared
+        # by flush(), which then rewrites the whole state
+        self._write_failures = 0
+        self._write_error = None
+        self._failures_seen = 0
+        threading.Thread(target=self._writer_loop, name="risk-writer", daemon=True).start()
+        atexit.register(self.shutdown)
+        if self._wal.tell() or self._last_serialized is None:
+            # Fold the replayed log into a fresh snapshot (or write the first one),
+            # so STATE_FILE always exists and reflects the state for operators
+            self._compact()
+        # The environment doesn't change after startup, so read KILL_SWITCH once;
+        # operators can flip it on a running bot with `kill -USR1 <pid>`
+        self._kill_switch = os.getenv("KILL_SWITCH", "false").lower() == "true"
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._toggle_kill_switch)
+        # Local-midnight timestamp before which the daily counters can't need a reset
+        self._next_day_ts = 0.0
+        # Parsed cooldown_until, re-parsed only when the stored string changes
+        self._cooldown_raw = None
+        self._cooldown_end = None
 
     def _load_state(self) -> dict:
+        """Snapshot from STATE_FILE (or defaults), then replay the WAL on top of it"""
+        snapshot_mtime = None
         if os.path.exists(STATE_FILE):
-            with open(STATE_FILE) as f:
-                return json.load(f)
-        return {
-            "daily_pnl": 0.0,
-            "daily_date": str(date.today()),
-            "max_drawdown_seen": 0.0,
-            "peak_equity": TRADING["capital_limit_usdt"],
-            "consecutive_losses": 0,
-            "cooldown_until": None,
-            "live_trading_disabled": False,
-            "total_positions": 0
-        }
+            with open(STATE_FILE, "rb") as f:
+                st = os.fstat(f.fileno())
+                snapshot_mtime = st.st_mtime_ns
+                if st.st_size:
+                    # Parse straight from the page cache instead of copying into a read buffer
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                        state = _loads(view)
+                else:
+                    state = _loads(f.read())
+            # What the snapshot holds now, so compacting an unchanged state skips the rewrite
+            self._last_serialized = _dumps(state)
+        else:
+            self._last_serialized = None
+            state = {
+                "daily_pnl": 0.0,
+                "daily_date": str(date.today()),
+                "max_drawdown_seen": 0.0,
+                "peak_equity": TRADING["capital_limit_usdt"],
+                "consecutive_losses": 0,
+                "cooldown_until": None,
+                "live_trading_disabled": False,
+                "total_positions": 0
+            }
+        if not os.path.exists(WAL_FILE):
+            return state
+        wal = os.stat(WAL_FILE)
+        if wal.st_size and snapshot_mtime is not None and snapshot_mtime > wal.st_mtime_ns:
+            # The bot only appends to the WAL after writing a snapshot, so a newer snapshot
+            # was either edited by hand or written by a compaction that crashed before
+            # truncating the log. Either way it already holds the state to use.
+            logger.warning(f"{STATE_FILE} is newer than {WAL_FILE} — using the snapshot as-is")
+            return state
+        with open(WAL_FILE, "rb") as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    state.update(_loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping torn risk WAL record at {WAL_FILE}:{line_no}")
+        return state
+
+    def _save_state(self, data: bytes):
+        """Write via a temp file + os.replace with a single fsync, so a crash never tears the file"""
+        if data == self._last_serialized:
+            return
+        tmp = STATE_FILE + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, STATE_FILE)
+        self._last_serialized = data
+
+    def _writer_loop(self):
+        """Drain the queue in batches so a backlog costs one fsync, not one per item"""
+        while True:
+            batch = [self._writer_q.get()]
+            while True:
+                try:
+                    batch.append(self._writer_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to save risk state: {e}")
+                self._write_error = e
+                self._write_failures += 1
+            finally:
+                for _ in batch:
+                    self._writer_q.task_done()
+
+    def _write_batch(self, batch: list[tuple]):
+        """
+        Items are (wal_record, snapshot), either of which may be None. Records reach
+        the WAL before any later snapshot, so every change since the last truncate is
+        in the log and replaying it over the new snapshot (after a crash before the
+        truncate) ends in the same state. Only the last snapshot in a batch is written.
+        """
+        last_snapshot = max((i for i, (_, snapshot) in enumerate(batch) if snapshot is not None), default=-1)
+        if last_snapshot >= 0:
+            self._append(batch[:last_snapshot + 1])
+            self._save_state(batch[last_snapshot][1])
+            self._wal.truncate(0)
+        self._append(batch[last_snapshot + 1:])
+
+    def _append(self, batch: list[tuple]):
+        data = b"".join(record for record, _ in batch if record is not None)
+        if data:
+            self._wal.write(data)
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
 
-    def _save_state(self):
-        with open(STATE_FILE, "w") as f:
-            json.dump(self.state, f, indent=2)
+    def _enqueue(self, item: tuple, wait: bool) -> bool:
+        """Hand a write to the writer thread; with wait, block until the queue is drained"""
+        try:
+            self._writer_q.put(item, block=wait)
+        except queue.Full:
+            return False
+        if wait:
+            self._writer_q.join()
+        return True
+
+    def _compact(self, wait: bool = False, record: bytes = None) -> bool:
+        """Snapshot the state and truncate the WAL, logging record (the last delta) first"""
+        if not self._enqueue((record, _dumps(self.state)), wait):
+            return False
+        self._wal_records = 0
+        return True
+
+    def flush(self, wait: bool = False):
+        """
+        Persist all state changes since the last flush. Engines call this once per tick.
+        The write happens in the background unless wait is set, in which case this
+        blocks until it is on disk and raises if it failed.
+        """
+        failures = self._write_failures
+        if failures != self._failures_seen:
+            # An earlier write never reached disk: log the full state and snapshot it
+            self._failures_seen = failures
+            self._persisted = {}
+            self._wal_records = _WAL_COMPACT_EVERY
+            self._dirty = True
+        if not self._dirty:
+            return
+        if _owners.get(self._wal_path) is not self:
+            logger.warning(f"A newer RiskManager owns {self._wal_path} — not persisting this instance's state")
+            self._dirty = False
+            return
+        try:
+            changed = {k: v for k, v in self.state.items()
+                       if k not in self._persisted or self._persisted[k] != v}
+            record = _dumps(changed, indent=False) + b"\n" if changed else None
+            if self._wal_records >= _WAL_COMPACT_EVERY:
+                queued = self._compact(wait, record)
+            elif record:
+                queued = self._enqueue((record, None), wait)
+                if queued:
+                    self._wal_records += 1
+            else:
+                queued = True
+            if not queued:
+                # The disk is far behind; keep the changes dirty so the next flush retries them
+                logger.warning("Risk state writer is backed up — deferring flush")
+                return
+            self._persisted = dict(self.state)
+            self._dirty = False
+            if wait and self._write_failures != failures:
+                raise OSError(f"risk state did not reach disk: {self._write_error}")
+        except Exception as e:
+            logger.error(f"Failed to save risk state: {e}")
+            if wait:
+                raise
+
+    def shutdown(self):
+        """Persist everything and fold the WAL into the snapshot, so a stopped bot leaves only STATE_FILE"""
+        if _owners.get(self._wal_path) is not self:
+            return
+        self.flush(wait=True)
+        if self._wal_records:
+            self._compact(wait=True)
+        self._writer_q.join()
 
     def _reset_daily_if_new_day(self):
-        today = str(date.today())
+        # A float compare on the hot path; the date is only rebuilt once the day may have rolled over
+        if time.time() < self._next_day_ts:
+            return
+        today = date.today()
+        self._next_day_ts = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        today = str(today)
         if self.state["daily_date"] != today:
             self.state["daily_date"] = today
             self.state["daily_pnl"] = 0.0
             logger.info("New trading day — daily loss counter reset")
-            self._save_state()
+            self._dirty = True
+
+    def _toggle_kill_switch(self, signum, frame):
+        self._kill_switch = not self._kill_switch
+        logger.warning(f"KILL SWITCH toggled {'ON' if self._kill_switch else 'OFF'} via SIGUSR1")
 
     def check_kill_switch(self) -> tuple[bool, str]:
         """Hard stop — overrides everything"""
-        if os.getenv("KILL_SWITCH", "false").lower() == "true":
+        if self._kill_switch:
             return False, "KILL SWITCH is ON — all trading disabled"
         return True, ""
 
+    def _get_cooldown_end(self):
+        raw = self.state["cooldown_until"]
+        if raw != self._cooldown_raw:
+            self._cooldown_raw = raw
+            self._cooldown_end = datetime.fromisoformat(raw) if raw else None
+        return self._cooldown_end
+
     def can_open_position(self, usdt_amount: float, signal_confidence: float) -> tuple[bool, str]:
         """
         Full pre-trade safety check. Returns (allowed, reason).
@@ -68,18 +293,19 @@ class RiskManager:
         if self.state["live_trading_disabled"]:
             return False, "Live trading disabled — max drawdown breached. Manual review required."
 
-        # 3. Cooldown check
-        if self.state["cooldown_until"]:
-            cooldown_end = datetime.fromisoformat(self.state["cooldown_until"])
-            if datetime.utcnow() < cooldown_end:
-                remaining = (cooldown_end - datetime.utcnow()).seconds // 60
-                return False, f"Cooldown active — {remaining} minutes remaining after {RISK['consecutive_loss_limit']} consecutive losses"
-
-        # 4. Daily loss cap
+        # 3. Daily loss cap (plain arithmetic, so it runs before the cooldown's datetime work)
         daily_loss_pct = abs(self.state["daily_pnl"]) / self.equity * 100 if self.state["daily_pnl"] < 0 else 0
         if daily_loss_pct >= RISK["daily_loss_cap_pct"]:
             return False, f"Daily loss cap hit ({daily_loss_pct:.2f}% >= {RISK['daily_loss_cap_pct']}%) — no more trades today"
 
+        # 4. Cooldown check
+        cooldown_end = self._get_cooldown_end()
+        if cooldown_end is not None:
+            now = datetime.utcnow()
+            if now < cooldown_end:
+                remaining = (cooldown_end - now).seconds // 60
+                return False, f"Cooldown active — {remaining} minutes remaining after {RISK['consecutive_loss_limit']} consecutive losses"
+
         # 5. Concurrent positions
         if self.state["total_positions"] >= RISK["max_concurrent_positions"]:
             return False, f"Max concurrent positions reached ({RISK['max_concurrent_positions']})"
@@ -97,7 +323,7 @@ class RiskManager:
         if usdt_amount < TRADING["min_order_usdt"]:
             return False, f"Order too small (${usdt_amount:.2f} < ${TRADING['min_order_usdt']} minimum)"
 
-        logger.info(f"Pre-trade checks PASSED | Amount: ${usdt_amount:.2f} | Confidence: {signal_confidence:.2f}")
+        logger.info("Pre-trade checks PASSED | Amount: $%.2f | Confidence: %.2f", usdt_amount, signal_confidence)
         return True, "All checks passed"
 
     def calculate_position_size(self, equity: float) -> float:
@@ -108,7 +334,7 @@ class RiskManager:
 
     def on_trade_open(self):
         self.state["total_positions"] += 1
-        self._save_state()
+        self._dirty = True
 
     def on_trade_close(self, pnl_usdt: float):
         """Update risk state after a trade closes"""
@@ -129,9 +355,10 @@ class RiskManager:
             logger.warning(f"Consecutive losses: {self.state['consecutive_losses']}")
 
             if self.state["consecutive_losses"] >= RISK["consecutive_loss_limit"]:
-                from datetime import timedelta
                 cooldown_end = datetime.utcnow() + timedelta(minutes=RISK["cooldown_minutes"])
                 self.state["cooldown_until"] = cooldown_end.isoformat()
+                # Prime the parse cache so the next pre-trade check doesn't re-parse it
+                self._cooldown_raw, self._cooldown_end = self.state["cooldown_until"], cooldown_end
                 logger.warning(f"Consecutive loss limit hit — cooldown until {cooldown_end}")
         else:
             self.state["consecutive_losses"] = 0
@@ -142,8 +369,10 @@ class RiskManager:
             self.state["live_trading_disabled"] = True
             logger.critical(f"MAX DRAWDOWN BREACHED ({drawdown_pct:.2f}%) — live trading DISABLED. Manual review required.")
 
-        self._save_state()
+        self._dirty = True
         logger.info(f"Trade closed | PnL: ${pnl_usdt:+.2f} | Daily PnL: ${self.state['daily_pnl']:+.2f} | Drawdown: {drawdown_pct:.2f}%")
+        if self.state["live_trading_disabled"]:
+            self.flush(wait=True)  # never let a restart lose the drawdown lockout; raises if it can't
 
     def get_stop_loss(self, buy_price: float) -> float:
         return round(buy_price * (1 - RISK["stop_loss_pct"] / 100), 2)
@@ -158,5 +387,5 @@ class RiskManager:
             "max_drawdown_seen": self.state["max_drawdown_seen"],
             "consecutive_losses": self.state["consecutive_losses"],
             "live_trading_disabled": self.state["live_trading_disabled"],
-            "kill_switch": os.getenv("KILL_SWITCH", "false").lower() == "true"
+            "kill_switch": self._kill_switch
         }
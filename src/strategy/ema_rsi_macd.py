@@ -1,5 +1,7 @@
-import pandas as pd
-from dataclasses import dataclass
+import numpy as np
+from bisect import bisect_left, bisect_right
+from collections import deque
+from dataclasses import dataclass, field
 from config import STRATEGY
 
 @dataclass
@@ -9,105 +11,448 @@ class SignalResult:
     reason: str
     indicators: dict
 
-def _ema(series, period):
-    return series.ewm(span=period, adjust=False).mean()
+# STRATEGY doesn't change while the bot runs, so the per-candle paths use these
+# import-time constants instead of looking its keys up on every call
+_MIN_CANDLES = STRATEGY["min_candles_required"]
+_MIN_ATR_PCT = STRATEGY["min_atr_pct"]
+_RSI_PERIOD = STRATEGY["rsi_period"]
+_RSI_ALPHA = 1 / _RSI_PERIOD  # com = period - 1
+_EMA_FAST_ALPHA = 2 / (STRATEGY["ema_fast"] + 1)
+_EMA_SLOW_ALPHA = 2 / (STRATEGY["ema_slow"] + 1)
+_MACD_FAST_ALPHA = 2 / (STRATEGY["macd_fast"] + 1)
+_MACD_SLOW_ALPHA = 2 / (STRATEGY["macd_slow"] + 1)
+_MACD_SIGNAL_ALPHA = 2 / (STRATEGY["macd_signal"] + 1)
 
-def _rsi(series, period):
-    delta = series.diff()
-    gain = delta.clip(lower=0).ewm(com=period - 1, min_periods=period).mean()
-    loss = (-delta.clip(upper=0)).ewm(com=period - 1, min_periods=period).mean()
-    rs = gain / loss.replace(0, 1e-10)
+try:
+    from numba import njit
+except ImportError:  # optional: without numba the EWM kernel runs as plain Python
+    njit = None
+
+def _ewm_kernel(xs, alpha, adjust, min_periods, out):
+    """
+    Exponentially weighted mean with pandas' ewm().mean() semantics (NaN-aware,
+    same update order), so results match it bit for bit. Written to compile
+    under numba's nopython mode as well as run on a list of Python floats.
+    """
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+    weighted = xs[0]
+    nobs = int(weighted == weighted)
+    out[0] = weighted if nobs >= min_periods else np.nan
+    old_wt = 1.0
+    for i in range(1, len(xs)):
+        cur = xs[i]
+        is_obs = cur == cur
+        nobs += is_obs
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = old_wt + new_wt if adjust else 1.0
+        elif is_obs:
+            weighted = cur
+        out[i] = weighted if nobs >= min_periods else np.nan
+
+# No fastmath: it would break the NaN checks and the bit-exact match with pandas
+_ewm_kernel_jit = njit(cache=True)(_ewm_kernel) if njit is not None else None
+
+def _ewm_mean(values: np.ndarray, alpha: float, adjust: bool, min_periods: int = 0) -> np.ndarray:
+    out = np.empty(len(values), dtype=np.float64)
+    if not len(values):
+        return out
+    if _ewm_kernel_jit is not None:
+        _ewm_kernel_jit(np.ascontiguousarray(values, dtype=np.float64), alpha, adjust, min_periods, out)
+    else:
+        # Python floats from a list index far faster than NumPy scalars
+        _ewm_kernel(values.tolist(), alpha, adjust, min_periods, out)
+    return out
+
+def _rsi(values: np.ndarray) -> np.ndarray:
+    delta = np.diff(values, prepend=np.nan)
+    gain = _ewm_mean(np.maximum(delta, 0), _RSI_ALPHA, adjust=True, min_periods=_RSI_PERIOD)
+    loss = _ewm_mean(-np.minimum(delta, 0), _RSI_ALPHA, adjust=True, min_periods=_RSI_PERIOD)
+    rs = gain / np.where(loss == 0, 1e-10, loss)
     return 100 - (100 / (1 + rs))
 
-def _macd(series):
-    ema_f = _ema(series, STRATEGY["macd_fast"])
-    ema_s = _ema(series, STRATEGY["macd_slow"])
-    line = ema_f - ema_s
-    signal = _ema(line, STRATEGY["macd_signal"])
-    return line, signal, line - signal
-
-def _atr(df, period=14):
-    high, low, close = df["high"], df["low"], df["close"]
-    tr = pd.concat([
-        high - low,
-        (high - close.shift()).abs(),
-        (low - close.shift()).abs()
-    ], axis=1).max(axis=1)
-    return tr.rolling(period).mean()
+def _ema_step(weighted, cur, alpha):
+    # One adjust=False _ewm_kernel step on a NaN-free series (old_wt is always 1 there)
+    if weighted != cur:
+        weighted = ((1.0 - alpha) * weighted + alpha * cur) / ((1.0 - alpha) + alpha)
+    return weighted
+
+def _ema_macd_kernel(xs, a_fast, a_slow, a_mfast, a_mslow, a_msig, ema_fast, ema_slow, macd_line, macd_signal):
+    """
+    The trend EMAs, the MACD line and its signal EMA in a single pass over the
+    closes: five scalar accumulators instead of five ewm() passes. Closes from
+    the exchange never hold NaN, which lets each step skip _ewm_kernel's NaN
+    bookkeeping while producing the same bits.
+    """
+    f = s = mf = ms = xs[0]
+    sig = 0.0  # fast - slow on the first bar
+    ema_fast[0], ema_slow[0], macd_line[0], macd_signal[0] = f, s, sig, sig
+    for i in range(1, len(xs)):
+        cur = xs[i]
+        f = _ema_step(f, cur, a_fast)
+        s = _ema_step(s, cur, a_slow)
+        mf = _ema_step(mf, cur, a_mfast)
+        ms = _ema_step(ms, cur, a_mslow)
+        line = mf - ms
+        sig = _ema_step(sig, line, a_msig)
+        ema_fast[i], ema_slow[i], macd_line[i], macd_signal[i] = f, s, line, sig
+
+if njit is not None:
+    _ema_step = njit(cache=True)(_ema_step)
+    _ema_macd_kernel_jit = njit(cache=True)(_ema_macd_kernel)
+else:
+    _ema_macd_kernel_jit = None
+
+def _ema_macd(values: np.ndarray):
+    """(ema_fast, ema_slow, macd_line, macd_signal) for a NaN-free close array"""
+    n = len(values)
+    out = tuple(np.empty(n, dtype=np.float64) for _ in range(4))
+    if not n:
+        return out
+    alphas = (_EMA_FAST_ALPHA, _EMA_SLOW_ALPHA, _MACD_FAST_ALPHA, _MACD_SLOW_ALPHA, _MACD_SIGNAL_ALPHA)
+    if _ema_macd_kernel_jit is not None:
+        _ema_macd_kernel_jit(np.ascontiguousarray(values, dtype=np.float64), *alphas, *out)
+    else:
+        _ema_macd_kernel(values.tolist(), *alphas, *out)
+    return out
+
+_ATR_PERIOD = 14
+
+def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period=_ATR_PERIOD) -> np.ndarray:
+    # The first bar has no previous close, so its true range is just high - low
+    tr = high - low
+    prev_close = close[:-1]
+    np.maximum(tr[1:], np.abs(high[1:] - prev_close), out=tr[1:])
+    np.maximum(tr[1:], np.abs(low[1:] - prev_close), out=tr[1:])
+    atr = np.full(len(tr), np.nan)
+    if len(tr) >= period:
+        atr[period - 1:] = np.lib.stride_tricks.sliding_window_view(tr, period).mean(axis=1)
+    return atr
+
+def compute_indicators(df) -> dict:
+    """Compute every indicator series once over the full frame as float64 arrays.
+
+    All indicators are causal, so the value at bar i equals what analyze()
+    would compute on df.iloc[:i+1].
+    """
+    close = df["close"].to_numpy(dtype=np.float64)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    ema_fast, ema_slow, macd_line, macd_sig = _ema_macd(close)
+    return {
+        "close": close,
+        "ema_fast": ema_fast,
+        "ema_slow": ema_slow,
+        "rsi": _rsi(close),
+        "macd": macd_line,
+        "macd_signal": macd_sig,
+        "atr": _atr(high, low, close),
+    }
 
 def analyze(df):
-    if len(df) < STRATEGY["min_candles_required"]:
+    if len(df) < _MIN_CANDLES:
         return SignalResult("HOLD", 0.0, "Not enough candles", {})
+    return signal_at(compute_indicators(df), len(df) - 1)
 
-    close = df["close"]
-    ef = _ema(close, STRATEGY["ema_fast"])
-    es = _ema(close, STRATEGY["ema_slow"])
-    rsi = _rsi(close, STRATEGY["rsi_period"])
-    macd_line, macd_sig, _ = _macd(close)
-    atr = _atr(df)
-
-    ef1, es1 = ef.iloc[-1], es.iloc[-1]
-    ef2, es2 = ef.iloc[-2], es.iloc[-2]
-    r = rsi.iloc[-1]
-    ml1, ms1 = macd_line.iloc[-1], macd_sig.iloc[-1]
-    ml2, ms2 = macd_line.iloc[-2], macd_sig.iloc[-2]
-    atr_pct = (atr.iloc[-1] / close.iloc[-1]) * 100
-    price = close.iloc[-1]
+def signal_at(ind: dict, i: int) -> SignalResult:
+    """Evaluate the strategy on bar i of precomputed indicator arrays"""
+    if i + 1 < _MIN_CANDLES:
+        return SignalResult("HOLD", 0.0, "Not enough candles", {})
 
-    indicators = {
-        "ema_fast": round(ef1, 2),
-        "ema_slow": round(es1, 2),
-        "rsi": round(r, 2),
-        "macd": round(ml1, 4),
-        "macd_signal": round(ms1, 4),
-        "atr_pct": round(atr_pct, 4),
-        "price": round(price, 2)
-    }
+    ef, es = ind["ema_fast"], ind["ema_slow"]
+    macd_line, macd_sig = ind["macd"], ind["macd_signal"]
+    ef1, es1 = ef[i], es[i]
+    ef2, es2 = ef[i-1], es[i-1]
+    r = ind["rsi"][i]
+    ml1, ms1 = macd_line[i], macd_sig[i]
+    ml2, ms2 = macd_line[i-1], macd_sig[i-1]
+    price = ind["close"][i]
+    atr_pct = (ind["atr"][i] / price) * 100
 
-    if atr_pct < 0.02:  # lowered from 0.03
-        return SignalResult("HOLD", 0.0, "Volatility too low", indicators)
+    return _decide(ef1, es1, ef2, es2, r, ml1, ms1, ml2, ms2, price, atr_pct)
 
-    uptrend        = ef1 > es1
-    downtrend      = ef1 < es1
-    ema_cross_up   = ef2 <= es2 and ef1 > es1
-    ema_cross_down = ef2 >= es2 and ef1 < es1
-    macd_bullish   = ml1 > ms1
-    macd_bearish   = ml1 < ms1
-    macd_cross_up  = ml2 <= ms2 and ml1 > ms1
-    macd_cross_down= ml2 >= ms2 and ml1 < ms1
+def _rules(uptrend, downtrend, ema_cross_up, ema_cross_down,
+           macd_bullish, macd_bearish, macd_cross_up, macd_cross_down, r) -> tuple:
+    """The signal rule cascade as (signal, confidence, reason); compiled into _DECISION_TABLE"""
     rsi_ok_buy     = r < STRATEGY["rsi_overbought"]   # < 70
     rsi_ok_sell    = r > STRATEGY["rsi_oversold"]      # > 30
 
     # --- STRONG BUY signals (0.80) ---
     if ema_cross_up and rsi_ok_buy and macd_bullish:
-        return SignalResult("BUY", 0.80, "EMA cross up + MACD bullish", indicators)
+        return "BUY", 0.80, "EMA cross up + MACD bullish"
 
     # --- MEDIUM BUY signals (0.65) ---
-    if uptrend and macd_cross_up and r < 60:
-        return SignalResult("BUY", 0.65, "Uptrend + MACD cross up", indicators)
-    if macd_cross_up and r < 45:                      # NEW: oversold bounce
-        return SignalResult("BUY", 0.65, "Oversold MACD cross up", indicators)
+    if uptrend and macd_cross_up and r < STRATEGY["rsi_trend_cross_buy_max"]:
+        return "BUY", 0.65, "Uptrend + MACD cross up"
+    if macd_cross_up and r < STRATEGY["rsi_oversold_cross_max"]:
+        return "BUY", 0.65, "Oversold MACD cross up"
 
     # --- RELAXED BUY signals (0.60) ---
-    if uptrend and macd_bullish and r < 55:           # was r < 50
-        return SignalResult("BUY", 0.60, "Uptrend + MACD bullish", indicators)
-    if macd_bullish and r < 35 and not downtrend:     # NEW: deep oversold
-        return SignalResult("BUY", 0.60, "Deep oversold + MACD bullish", indicators)
+    if uptrend and macd_bullish and r < STRATEGY["rsi_trend_buy_max"]:
+        return "BUY", 0.60, "Uptrend + MACD bullish"
+    if macd_bullish and r < STRATEGY["rsi_deep_oversold"] and not downtrend:
+        return "BUY", 0.60, "Deep oversold + MACD bullish"
 
     # --- STRONG SELL signals (0.80) ---
     if ema_cross_down and rsi_ok_sell and macd_bearish:
-        return SignalResult("SELL", 0.80, "EMA cross down + MACD bearish", indicators)
+        return "SELL", 0.80, "EMA cross down + MACD bearish"
 
     # --- MEDIUM SELL signals (0.65) ---
-    if downtrend and macd_cross_down and r > 40:
-        return SignalResult("SELL", 0.65, "Downtrend + MACD cross down", indicators)
-    if macd_cross_down and r > 55:                    # NEW: overbought drop
-        return SignalResult("SELL", 0.65, "Overbought MACD cross down", indicators)
+    if downtrend and macd_cross_down and r > STRATEGY["rsi_trend_cross_sell_min"]:
+        return "SELL", 0.65, "Downtrend + MACD cross down"
+    if macd_cross_down and r > STRATEGY["rsi_overbought_cross_min"]:
+        return "SELL", 0.65, "Overbought MACD cross down"
 
     # --- RELAXED SELL signals (0.60) ---
-    if downtrend and macd_bearish and r > 45:         # was r > 50
-        return SignalResult("SELL", 0.60, "Downtrend + MACD bearish", indicators)
-    if macd_bearish and r > 65 and not uptrend:       # NEW: overbought exit
-        return SignalResult("SELL", 0.60, "Overbought + MACD bearish", indicators)
+    if downtrend and macd_bearish and r > STRATEGY["rsi_trend_sell_min"]:
+        return "SELL", 0.60, "Downtrend + MACD bearish"
+    if macd_bearish and r > STRATEGY["rsi_overbought_exit"] and not uptrend:
+        return "SELL", 0.60, "Overbought + MACD bearish"
+
+    return "HOLD", 0.0, "No confirmed signal"
+
+# Every RSI threshold _rules compares against: the outcome only depends on
+# where r falls relative to these, so r is discretised into bands
+_RSI_LEVELS = tuple(sorted({STRATEGY[k] for k in (
+    "rsi_oversold", "rsi_overbought",
+    "rsi_trend_cross_buy_max", "rsi_oversold_cross_max", "rsi_trend_buy_max", "rsi_deep_oversold",
+    "rsi_trend_cross_sell_min", "rsi_overbought_cross_min", "rsi_trend_sell_min", "rsi_overbought_exit",
+)}))
+
+def _rsi_band(r) -> int:
+    """0 for NaN; otherwise 1 + (2k for strictly between levels, 2k+1 for exactly on level k)"""
+    if r != r:
+        return 0
+    return 1 + bisect_left(_RSI_LEVELS, r) + bisect_right(_RSI_LEVELS, r)
+
+def _build_decision_table() -> list:
+    """Evaluate _rules once for every flag combination and RSI band"""
+    lv = _RSI_LEVELS
+    reps = [float("nan"), lv[0] - 1]  # a representative r for each band
+    for k in range(len(lv)):
+        reps.append(lv[k])
+        reps.append((lv[k] + lv[k + 1]) / 2 if k + 1 < len(lv) else lv[k] + 1)
+    table = [None] * (256 << 5)
+    for flags in range(256):
+        bits = [bool(flags >> b & 1) for b in range(8)]
+        for band, r in enumerate(reps):
+            table[flags << 5 | band] = _rules(*bits, r)
+    return table
+
+_DECISION_TABLE = _build_decision_table()
+
+def _decide(ef1, es1, ef2, es2, r, ml1, ms1, ml2, ms2, price, atr_pct) -> SignalResult:
+    """Signal rules on the current (1) and previous (2) bar indicator values"""
+    indicators = {
+        "ema_fast": round(ef1, 2),
+        "ema_slow": round(es1, 2),
+        "rsi": round(r, 2),
+        "macd": round(ml1, 4),
+        "macd_signal": round(ms1, 4),
+        "atr_pct": round(atr_pct, 4),
+        "price": round(price, 2)
+    }
+
+    if atr_pct < _MIN_ATR_PCT:
+        return SignalResult("HOLD", 0.0, "Volatility too low", indicators)
+
+    uptrend, downtrend = ef1 > es1, ef1 < es1
+    macd_bullish, macd_bearish = ml1 > ms1, ml1 < ms1
+    flags = (uptrend
+             | downtrend << 1
+             | (ef2 <= es2 and uptrend) << 2           # EMA cross up
+             | (ef2 >= es2 and downtrend) << 3         # EMA cross down
+             | macd_bullish << 4
+             | macd_bearish << 5
+             | (ml2 <= ms2 and macd_bullish) << 6      # MACD cross up
+             | (ml2 >= ms2 and macd_bearish) << 7)     # MACD cross down
+    signal, confidence, reason = _DECISION_TABLE[flags << 5 | _rsi_band(r)]
+    return SignalResult(signal, confidence, reason, indicators)
+
+# ---------------------------------------------------------------------------
+# Incremental evaluation for the live/paper engines: indicator state is carried
+# between ticks and advanced by one closed candle at a time (O(1) per candle).
+# EMAs and RSI use the same update rule as _ewm_kernel, so they match the batch
+# indicators bit for bit and signals are identical.
+# ---------------------------------------------------------------------------
+
+_NAN = float("nan")
+
+def _ewm_update(weighted, old_wt, cur, alpha, adjust):
+    """One _ewm_kernel step for an observed value. Returns (weighted, old_wt)."""
+    if weighted != weighted:
+        return cur, old_wt
+    old_wt *= 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+    if weighted != cur:
+        weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+    return weighted, (old_wt + new_wt if adjust else 1.0)
+
+def _ema_update(prev, x, alpha):
+    # adjust=False resets the old weight to 1 every step, so no weight is carried
+    return _ewm_update(prev, 1.0, x, alpha, adjust=False)[0]
+
+@dataclass
+class IndicatorState:
+    """Indicator values carried between candles, advanced in place by update()"""
+    n: int = 0
+    close: float = _NAN
+    ema_fast: float = _NAN
+    ema_slow: float = _NAN
+    ema_fast_prev: float = _NAN
+    ema_slow_prev: float = _NAN
+    # MACD's own fast/slow EMAs; the line is their difference
+    macd_fast: float = _NAN
+    macd_slow: float = _NAN
+    macd_signal: float = _NAN
+    macd_line_prev: float = _NAN
+    macd_signal_prev: float = _NAN
+    # RSI: pandas' adjusted EWM of gains and losses; both share one weight
+    rsi_n: int = 0
+    avg_gain: float = _NAN
+    avg_loss: float = _NAN
+    rsi_wt: float = 1.0
+    # ATR: ring buffer of true ranges plus their running sum
+    tr: deque = field(default_factory=lambda: deque(maxlen=_ATR_PERIOD))
+    tr_sum: float = 0.0
+
+    @property
+    def macd_line(self) -> float:
+        return self.macd_fast - self.macd_slow
+
+    @property
+    def rsi(self) -> float:
+        if self.rsi_n < _RSI_PERIOD:
+            return _NAN
+        rs = self.avg_gain / (self.avg_loss if self.avg_loss != 0 else 1e-10)
+        return 100 - (100 / (1 + rs))
+
+    @property
+    def atr(self) -> float:
+        return self.tr_sum / _ATR_PERIOD if len(self.tr) == _ATR_PERIOD else _NAN
+
+    def update(self, high: float, low: float, close: float):
+        """Advance by one closed candle"""
+        prev_close = self.close
+        self.n += 1
+        self.close = close
+
+        self.ema_fast_prev, self.ema_slow_prev = self.ema_fast, self.ema_slow
+        self.ema_fast = _ema_update(self.ema_fast, close, _EMA_FAST_ALPHA)
+        self.ema_slow = _ema_update(self.ema_slow, close, _EMA_SLOW_ALPHA)
+
+        self.macd_line_prev, self.macd_signal_prev = self.macd_line, self.macd_signal
+        self.macd_fast = _ema_update(self.macd_fast, close, _MACD_FAST_ALPHA)
+        self.macd_slow = _ema_update(self.macd_slow, close, _MACD_SLOW_ALPHA)
+        self.macd_signal = _ema_update(self.macd_signal, self.macd_line, _MACD_SIGNAL_ALPHA)
+
+        if prev_close == prev_close:
+            delta = close - prev_close
+            self.rsi_n += 1
+            self.avg_gain, wt = _ewm_update(self.avg_gain, self.rsi_wt, max(delta, 0.0), _RSI_ALPHA, adjust=True)
+            self.avg_loss, _ = _ewm_update(self.avg_loss, self.rsi_wt, -min(delta, 0.0), _RSI_ALPHA, adjust=True)
+            self.rsi_wt = wt
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        else:
+            tr = high - low
+
+        if len(self.tr) == _ATR_PERIOD:
+            self.tr_sum -= self.tr[0]
+        self.tr.append(tr)
+        if self.n % _ATR_PERIOD == 0:
+            self.tr_sum = sum(self.tr)  # resync so add/subtract rounding can't accumulate
+        else:
+            self.tr_sum += tr
+
+def _evaluate(s: IndicatorState) -> SignalResult:
+    if s.n < _MIN_CANDLES:
+        return SignalResult("HOLD", 0.0, "Not enough candles", {})
+    price = s.close
+    return _decide(
+        s.ema_fast, s.ema_slow, s.ema_fast_prev, s.ema_slow_prev, s.rsi,
+        s.macd_line, s.macd_signal, s.macd_line_prev, s.macd_signal_prev,
+        price, (s.atr / price) * 100,
+    )
+
+def _fold(state: IndicatorState, df):
+    """Advance state through every candle of df, reading plain floats from the column arrays"""
+    for h, l, c in zip(df["high"].to_numpy(dtype=np.float64).tolist(),
+                       df["low"].to_numpy(dtype=np.float64).tolist(),
+                       df["close"].to_numpy(dtype=np.float64).tolist()):
+        state.update(h, l, c)
+
+def analyze_bootstrap(df) -> tuple:
+    """Build indicator state from a candle history. Returns (result for last candle, state)."""
+    state = IndicatorState()
+    _fold(state, df)
+    return _evaluate(state), state
+
+def analyze_incremental(row, state: IndicatorState) -> tuple:
+    """Advance state in place by one newly closed candle row. Returns (result, state)."""
+    state.update(float(row["high"]), float(row["low"]), float(row["close"]))
+    return _evaluate(state), state
+
+class Strategy:
+    """
+    Stateful analyze() for the live/paper engines: indicator state is carried
+    between calls, so each newly closed candle costs O(1) instead of a full
+    recompute over the candle history.
+    """
+
+    def __init__(self, timeframe_seconds: int, history_candles: int):
+        self.tf_ms = timeframe_seconds * 1000
+        self.history_candles = history_candles  # candles fetched to (re)build the state
+        self.state = None
+        self.close_ms = None  # close_time of the last candle folded into state
+        self.result = None
+
+    @property
+    def warm(self) -> bool:
+        return self.state is not None
+
+    def candle_limit(self, latest_close_ms: int) -> int:
+        """
+        Full history until the state exists; afterwards the candles closed since
+        the last analysed one, plus that candle (to check continuity) and the
+        still-open one
+        """
+        if not self.warm:
+            return self.history_candles
+        missed = (latest_close_ms - self.close_ms) // self.tf_ms
+        return min(self.history_candles, max(missed, 0) + 2)
+
+    def continues(self, df) -> bool:
+        """True if df contains the last analysed candle, so only newer rows need folding in"""
+        return self.state is not None and bool((df["close_time"] == self.close_ms).any())
+
+    def analyze(self, df) -> SignalResult:
+        """Signal for the last candle of df (closed candles only)"""
+        close_ms = int(df["close_time"].iat[-1])
+        if close_ms == self.close_ms:
+            return self.result  # polled again before a new candle closed
+        if self.continues(df):
+            new = df[df["close_time"] > self.close_ms]
+            if len(new):
+                # Only the latest candle's signal is needed, so evaluate once after folding
+                _fold(self.state, new)
+                self.result = _evaluate(self.state)
+        else:
+            # First call, or candles were missed: rebuild from the given history
+            self.result, self.state = analyze_bootstrap(df)
+        self.close_ms = close_ms
+        return self.result
 
-    return SignalResult("HOLD", 0.0, "No confirmed signal", indicators)
+    def analyze_window(self, df, fetch_history) -> SignalResult:
+        """
+        analyze() on closed candles fetched with candle_limit(). If they no longer
+        overlap the state, a short window can't rebuild it, so fetch_history(limit=...)
+        supplies the full history instead.
+        """
+        if self.warm and not self.continues(df) and len(df) < self.history_candles - 1:
+            history = fetch_history(limit=self.history_candles)
+            df = history[history["close_time"] <= df["close_time"].iat[-1]]
+        return self.analyze(df)
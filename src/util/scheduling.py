@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+# Canonical Binance-supported intervals only
+TIMEFRAME_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600,
+    "8h": 28800, "12h": 43200, "1d": 86400, "3d": 259200,
+    "1w": 604800,
+}
+CLOSE_BUFFER_SECONDS = 2
+
+
+def timeframe_to_seconds(tf: str) -> int:
+    if tf not in TIMEFRAME_SECONDS:
+        supported = ", ".join(TIMEFRAME_SECONDS.keys())
+        raise ValueError(f"Unsupported timeframe '{tf}'. Supported: {supported}")
+    return TIMEFRAME_SECONDS[tf]
+
+
+def next_candle_close_utc(tf_seconds: int) -> datetime:
+    """Next candle close boundary plus a small buffer so the candle is final on Binance"""
+    now_ts = datetime.now(timezone.utc).timestamp()
+    next_boundary = (int(now_ts / tf_seconds) + 1) * tf_seconds
+    return datetime.fromtimestamp(next_boundary + CLOSE_BUFFER_SECONDS, tz=timezone.utc)
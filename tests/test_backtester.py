@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+
+from src.backtest import backtester
+from src.backtest.backtester import _simulate
+
+
+def _simulate_per_bar(close, high, low, signals, start, capital, fee_pct, slip_pct,
+                      sl_frac, tp_frac, risk_frac, min_order, max_hold):
+    """The original bar-by-bar state machine that _simulate must reproduce"""
+    pnls, pnl_pcts, reasons, holds = [], [], [], []
+    total_fees = 0
+    in_position = False
+    buy_price = qty = sl = tp = 0.0
+    entry_i = 0
+
+    for i in range(start, len(close) - 1):
+        sig = signals[i]
+        price = close[i]
+
+        if not in_position and sig == 1:
+            usdt = capital * risk_frac
+            if usdt < min_order:
+                continue
+            buy_price = price * (1 + slip_pct)
+            fee = usdt * fee_pct
+            total_fees += fee
+            qty = (usdt - fee) / buy_price
+            sl = buy_price * (1 - sl_frac)
+            tp = buy_price * (1 + tp_frac)
+            entry_i = i
+            in_position = True
+
+        elif in_position:
+            exit_price = 0.0
+            reason = -1
+            if low[i] <= sl:
+                exit_price = sl * (1 - slip_pct)
+                reason = 0
+            elif high[i] >= tp:
+                exit_price = tp * (1 - slip_pct)
+                reason = 1
+            elif sig == -1:
+                exit_price = price * (1 - slip_pct)
+                reason = 2
+
+            holding = i - entry_i
+            if holding >= max_hold and reason < 0:
+                exit_price = price * (1 - slip_pct)
+                reason = 3
+
+            if exit_price:
+                fee = exit_price * qty * fee_pct
+                total_fees += fee
+                pnl = float((exit_price - buy_price) * qty - fee)
+                capital += pnl
+                pnls.append(round(pnl, 4))
+                pnl_pcts.append(round(float((exit_price - buy_price) / buy_price) * 100, 2))
+                reasons.append(reason)
+                holds.append(holding)
+                in_position = False
+
+    return pnls, pnl_pcts, reasons, holds, total_fees, capital
+
+
+def _random_cases(seed: int, count: int):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        n = int(rng.integers(2, 120))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        high = close * (1 + np.abs(rng.normal(0, 0.01, n)))
+        low = close * (1 - np.abs(rng.normal(0, 0.01, n)))
+        signals = rng.choice([-1, 0, 1], n, p=[0.2, 0.6, 0.2]).astype(np.int8)
+        yield (
+            close, high, low, signals,
+            int(rng.integers(0, 5)),             # start
+            float(rng.choice([20, 40, 100])),     # capital
+            0.001, 0.0005,                        # fee, slippage
+            0.015, 0.03, 0.1, 5,                  # sl, tp, risk fraction, min order
+            float(rng.choice([0, 1, 2.5, 3, 12])),  # max hold, incl. fractional
+        )
+
+
+class SimulateTest(unittest.TestCase):
+    def test_matches_per_bar_state_machine(self):
+        for args in _random_cases(0, 2000):
+            got = _simulate(*args)
+            want = _simulate_per_bar(*args)
+            for g, w in zip(got[:4], want[:4]):
+                np.testing.assert_array_equal(g, np.asarray(w, dtype=g.dtype))
+            self.assertEqual(got[4], want[4])
+            self.assertEqual(got[5], want[5])
+
+    def test_jit_kernel_matches_python(self):
+        if backtester.njit is None:
+            self.skipTest("numba not installed")
+        for args in _random_cases(1, 500):
+            py = backtester._simulate_kernel(*args)
+            jit = backtester._simulate_kernel_jit(*args)
+            for a, b in zip(py[:4], jit[:4]):
+                np.testing.assert_array_equal(a, b)
+            self.assertEqual(py[4:], jit[4:])
+
+    def test_no_trades(self):
+        close = np.full(10, 100.0)
+        signals = np.zeros(10, dtype=np.int8)
+        pnls, pnl_pcts, reasons, holds, fees, capital = _simulate(
+            close, close, close, signals, 0, 100.0, 0.001, 0.0, 0.015, 0.03, 0.1, 5, 12)
+        self.assertEqual(len(pnls), 0)
+        self.assertIsInstance(fees, float)
+        self.assertEqual(fees, 0.0)
+        self.assertEqual(capital, 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
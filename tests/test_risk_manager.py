@@ -0,0 +1,181 @@
+import atexit
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.risk import risk_manager
+
+
+class _CrashOnTruncate:
+    """WAL file wrapper whose truncate fails, like a crash right after the snapshot is replaced"""
+
+    def __init__(self, f):
+        self._f = f
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def truncate(self, size):
+        raise OSError("simulated crash before truncating the WAL")
+
+
+class RiskStatePersistenceTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_file = os.path.join(tmp.name, "risk_state.json")
+        self.wal_file = os.path.join(tmp.name, "risk_state.wal")
+        for name, value in (("STATE_FILE", self.state_file), ("WAL_FILE", self.wal_file)):
+            patcher = mock.patch.object(risk_manager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _start(self) -> risk_manager.RiskManager:
+        rm = risk_manager.RiskManager()
+        rm._writer_q.join()
+        return rm
+
+    def _crash(self, rm):
+        """Stop using rm without a clean shutdown, once its queued writes have landed"""
+        rm._writer_q.join()
+        atexit.unregister(rm.shutdown)
+
+    def _set(self, rm, **changes):
+        rm.state.update(changes)
+        rm._dirty = True
+        rm.flush()
+
+    def _snapshot(self) -> dict:
+        with open(self.state_file) as f:
+            return json.load(f)
+
+    def test_fresh_start_writes_snapshot(self):
+        rm = self._start()
+        self.assertEqual(self._snapshot(), rm.state)
+        rm.shutdown()
+
+    def test_restart_replays_wal(self):
+        rm = self._start()
+        self._set(rm, daily_pnl=-1.5)
+        self._set(rm, consecutive_losses=2, total_positions=1)
+        self._crash(rm)
+        self.assertGreater(os.path.getsize(self.wal_file), 0)
+
+        restarted = self._start()
+        self.assertEqual(restarted.state, rm.state)
+        self.assertEqual(os.path.getsize(self.wal_file), 0)  # folded into the snapshot at startup
+        self.assertEqual(self._snapshot(), rm.state)
+        restarted.shutdown()
+
+    def test_torn_record_is_skipped(self):
+        rm = self._start()
+        self._set(rm, daily_pnl=-2.0)
+        self._crash(rm)
+        with open(self.wal_file, "ab") as f:
+            f.write(b'{"daily_pnl": -9')
+
+        restarted = self._start()
+        self.assertEqual(restarted.state["daily_pnl"], -2.0)
+        restarted.shutdown()
+
+    def test_clean_shutdown_compacts(self):
+        rm = self._start()
+        self._set(rm, daily_pnl=-3.0)
+        rm.shutdown()
+        self.assertEqual(os.path.getsize(self.wal_file), 0)
+        self.assertEqual(self._snapshot()["daily_pnl"], -3.0)
+
+    def test_manual_reset_after_crash_is_kept(self):
+        rm = self._start()
+        rm.on_trade_open()
+        rm.on_trade_close(-50.0)  # breaches the drawdown cap and flushes synchronously
+        self._crash(rm)
+        with open(self.wal_file, "rb") as f:
+            self.assertIn(b'"live_trading_disabled":true', f.read().replace(b" ", b""))
+
+        # Operator clears the lockout in the snapshot while the bot is stopped
+        state = self._snapshot()
+        state["live_trading_disabled"] = False
+        with open(self.state_file, "w") as f:
+            json.dump(state, f, indent=2)
+        wal_mtime = os.stat(self.wal_file).st_mtime_ns
+        os.utime(self.state_file, ns=(wal_mtime + 1_000_000, wal_mtime + 1_000_000))
+
+        restarted = self._start()
+        self.assertFalse(restarted.get_status()["live_trading_disabled"])
+        restarted.shutdown()
+
+    def test_crash_between_snapshot_and_truncate(self):
+        with mock.patch.object(risk_manager, "_WAL_COMPACT_EVERY", 3):
+            rm = self._start()
+            for pnl in (-100.0, -300.0, -200.0):
+                self._set(rm, daily_pnl=pnl)
+            rm._writer_q.join()
+            rm._wal = _CrashOnTruncate(rm._wal)
+            self._set(rm, daily_pnl=-1000.0)  # the compacting flush
+            self._crash(rm)
+        self.assertEqual(self._snapshot()["daily_pnl"], -1000.0)
+        self.assertGreater(os.path.getsize(self.wal_file), 0)
+
+        # Snapshot newer than the WAL: used as-is
+        restarted = self._start()
+        self.assertEqual(restarted.state["daily_pnl"], -1000.0)
+        self._crash(restarted)
+
+    def test_crash_between_snapshot_and_truncate_with_coarse_mtimes(self):
+        with mock.patch.object(risk_manager, "_WAL_COMPACT_EVERY", 3):
+            rm = self._start()
+            for pnl in (-100.0, -300.0, -200.0):
+                self._set(rm, daily_pnl=pnl)
+            rm._writer_q.join()
+            rm._wal = _CrashOnTruncate(rm._wal)
+            self._set(rm, daily_pnl=-1000.0)
+            self._crash(rm)
+        # Same mtime on both files: the WAL is replayed, and must end on the snapshot's values
+        mtime = os.stat(self.state_file).st_mtime_ns
+        os.utime(self.wal_file, ns=(mtime, mtime))
+
+        restarted = self._start()
+        self.assertEqual(restarted.state["daily_pnl"], -1000.0)
+        self._crash(restarted)
+
+    def test_failed_write_is_retried(self):
+        rm = self._start()
+        with mock.patch("os.fsync", side_effect=OSError(28, "No space left on device")):
+            self._set(rm, daily_pnl=-7.0)
+            rm._writer_q.join()
+            rm.on_trade_open()
+            with self.assertRaises(OSError):
+                rm.on_trade_close(-50.0)  # the lockout write must not fail silently
+        rm.flush()
+        rm._writer_q.join()
+        self._crash(rm)
+
+        restarted = self._start()
+        self.assertEqual(restarted.state, rm.state)
+        self.assertTrue(restarted.state["live_trading_disabled"])
+        restarted.shutdown()
+
+    def test_stale_instance_shutdown_keeps_newer_state(self):
+        stale = self._start()
+        rm = self._start()
+        rm.on_trade_open()
+        rm.on_trade_close(-50.0)  # breaches the drawdown cap
+        self._set(stale, daily_date="2000-01-01")  # dirty, as after a day rollover
+        # atexit runs the handlers in reverse, so the older instance shuts down last
+        rm.shutdown()
+        stale.shutdown()
+        atexit.unregister(rm.shutdown)
+        atexit.unregister(stale.shutdown)
+
+        self.assertTrue(self._snapshot()["live_trading_disabled"])
+        self.assertEqual(os.path.getsize(self.wal_file), 0)
+        restarted = self._start()
+        self.assertEqual(restarted.state, rm.state)
+        restarted.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from config import STRATEGY
+from src.strategy import ema_rsi_macd as strategy
+
+
+def _candles(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random-walk 15m klines shaped like BinanceClient.get_klines output"""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.002, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.002, n)))
+    open_time = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 900_000
+    return pd.DataFrame({
+        "open_time": open_time, "open": open_, "high": high, "low": low, "close": close,
+        "volume": rng.uniform(1, 10, n), "close_time": open_time + 899_999,
+    })
+
+
+def _pandas_indicators(df) -> dict:
+    """The original pandas implementation the NumPy indicators must reproduce"""
+    def ema(series, period):
+        return series.ewm(span=period, adjust=False).mean()
+
+    close = df["close"]
+    period = STRATEGY["rsi_period"]
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(com=period - 1, min_periods=period).mean()
+    loss = (-delta.clip(upper=0)).ewm(com=period - 1, min_periods=period).mean()
+    line = ema(close, STRATEGY["macd_fast"]) - ema(close, STRATEGY["macd_slow"])
+    tr = pd.concat([
+        df["high"] - df["low"],
+        (df["high"] - close.shift()).abs(),
+        (df["low"] - close.shift()).abs(),
+    ], axis=1).max(axis=1)
+    return {
+        "ema_fast": ema(close, STRATEGY["ema_fast"]).to_numpy(),
+        "ema_slow": ema(close, STRATEGY["ema_slow"]).to_numpy(),
+        "rsi": (100 - (100 / (1 + gain / loss.replace(0, 1e-10)))).to_numpy(),
+        "macd": line.to_numpy(),
+        "macd_signal": ema(line, STRATEGY["macd_signal"]).to_numpy(),
+        "atr": tr.rolling(14).mean().to_numpy(),
+    }
+
+
+class BatchIndicatorTest(unittest.TestCase):
+    def test_matches_pandas_bit_for_bit(self):
+        for seed in range(3):
+            for n in (1, 2, 14, 15, 60, 500):
+                df = _candles(n, seed)
+                got = strategy.compute_indicators(df)
+                want = _pandas_indicators(df)
+                for key in ("ema_fast", "ema_slow", "rsi", "macd", "macd_signal"):
+                    np.testing.assert_array_equal(got[key], want[key], err_msg=f"{key} n={n} seed={seed}")
+                # Rolling sums vs window means differ in the last ulp
+                np.testing.assert_allclose(got["atr"], want["atr"], rtol=1e-12, err_msg=f"atr n={n}")
+
+    def test_empty_frame(self):
+        got = strategy.compute_indicators(_candles(10).iloc[:0])
+        self.assertTrue(all(len(v) == 0 for v in got.values()))
+
+    def test_jit_kernels_match_python(self):
+        if strategy.njit is None:
+            self.skipTest("numba not installed")
+        df = _candles(500, 7)
+        close = df["close"].to_numpy()
+        delta = np.diff(close, prepend=np.nan)
+        for alpha, adjust, min_periods, xs in ((0.2, False, 0, close), (1 / 14, True, 14, np.maximum(delta, 0))):
+            py, jit = np.empty(len(xs)), np.empty(len(xs))
+            strategy._ewm_kernel(xs.tolist(), alpha, adjust, min_periods, py)
+            strategy._ewm_kernel_jit(xs, alpha, adjust, min_periods, jit)
+            np.testing.assert_array_equal(py, jit)
+        alphas = (0.2, 1 / 11, 2 / 13, 2 / 27, 0.2)
+        py = tuple(np.empty(len(close)) for _ in range(4))
+        jit = tuple(np.empty(len(close)) for _ in range(4))
+        strategy._ema_macd_kernel(close.tolist(), *alphas, *py)
+        strategy._ema_macd_kernel_jit(close, *alphas, *jit)
+        for a, b in zip(py, jit):
+            np.testing.assert_array_equal(a, b)
+
+
+class DecisionTableTest(unittest.TestCase):
+    def test_table_matches_rule_cascade(self):
+        """_decide's table lookup against evaluating _rules directly, on tie-heavy random inputs"""
+        rng = np.random.default_rng(9)
+        levels = np.array(strategy._RSI_LEVELS, dtype=np.float64)
+        for _ in range(50_000):
+            # Few distinct values, so equal EMAs/MACDs (the crossing edge cases) are common
+            ef1, es1, ef2, es2, ml1, ms1, ml2, ms2 = rng.integers(0, 3, 8).astype(float).tolist()
+            pick = rng.integers(0, 4)
+            if pick == 0:
+                r = float(rng.choice(levels))
+            elif pick == 1:
+                r = float(np.nextafter(rng.choice(levels), rng.choice([-np.inf, np.inf])))
+            elif pick == 2:
+                r = float(rng.uniform(0, 100))
+            else:
+                r = float("nan")
+            atr_pct = float(rng.choice([0.0, STRATEGY["min_atr_pct"], 0.5]))
+
+            got = strategy._decide(ef1, es1, ef2, es2, r, ml1, ms1, ml2, ms2, 100.0, atr_pct)
+            if atr_pct < STRATEGY["min_atr_pct"]:
+                want = ("HOLD", 0.0, "Volatility too low")
+            else:
+                uptrend, downtrend = ef1 > es1, ef1 < es1
+                bullish, bearish = ml1 > ms1, ml1 < ms1
+                want = strategy._rules(
+                    uptrend, downtrend, ef2 <= es2 and uptrend, ef2 >= es2 and downtrend,
+                    bullish, bearish, ml2 <= ms2 and bullish, ml2 >= ms2 and bearish, r,
+                )
+            self.assertEqual((got.signal, got.confidence, got.reason), want,
+                             f"ema {ef1, es1, ef2, es2} macd {ml1, ms1, ml2, ms2} rsi {r}")
+
+
+class IncrementalTest(unittest.TestCase):
+    def test_state_matches_batch_indicators(self):
+        df = _candles(700, 3)
+        ind = strategy.compute_indicators(df)
+        state = strategy.IndicatorState()
+        for i, (h, l, c) in enumerate(zip(df["high"].tolist(), df["low"].tolist(), df["close"].tolist())):
+            state.update(h, l, c)
+            got = {"ema_fast": state.ema_fast, "ema_slow": state.ema_slow, "rsi": state.rsi,
+                   "macd": state.macd_line, "macd_signal": state.macd_signal}
+            for key, value in got.items():
+                np.testing.assert_array_equal(value, ind[key][i], err_msg=f"{key} at bar {i}")
+            np.testing.assert_allclose(state.atr, ind["atr"][i], rtol=1e-12, err_msg=f"atr at bar {i}")
+
+    def test_strategy_signals_match_analyze(self):
+        df = _candles(400, 4)
+        rng = np.random.default_rng(4)
+        s = strategy.Strategy(timeframe_seconds=900, history_candles=100)
+        end, boot_start = 120, None
+        while end <= len(df):
+            # Short overlapping windows continue the state; a gap rebuilds it from the window
+            start = end - 100 if rng.random() < 0.2 else end - int(rng.integers(2, 5))
+            window = df.iloc[start:end]
+            if not s.continues(window):
+                boot_start = start
+            self.assertEqual(s.analyze(window), strategy.analyze(df.iloc[boot_start:end]), f"bar {end}")
+            end += int(rng.choice([1, 1, 2, 3]))
+
+    def test_repeat_poll_returns_cached_result(self):
+        df = _candles(200)
+        s = strategy.Strategy(timeframe_seconds=900, history_candles=100)
+        first = s.analyze(df.iloc[:150])
+        self.assertIs(s.analyze(df.iloc[:150]), first)
+
+
+if __name__ == "__main__":
+    unittest.main()